@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# -----------------------------------------------------------------------------
+# BENCHMARKS.CLIP2D_ESTIMATORS
+# Laura L Watkins [lauralwatkins@gmail.com]
+# -----------------------------------------------------------------------------
+
+"""
+Run time of clip2d with each of the centre and dispersion estimators, for
+datasets of 10^5 points up to 10^maxpower points (10^8 needs several GB of
+memory). Each dataset is a 2D Gaussian with 5% of outliers.
+
+USAGE
+  python benchmarks/clip2d_estimators.py [maxpower]
+"""
+
+from __future__ import division, print_function
+import sys
+import time
+import numpy as np
+import toolbox
+
+
+def main(maxpower=7):
+    
+    rng = np.random.default_rng(42)
+    estimators = ("fit", "moments", "median", "biweight")
+    
+    print("\nclip2d run time by estimator")
+    print("  {:>10}".format("points") \
+        + "".join(" {:>10}".format(e) for e in estimators))
+    
+    for power in range(5, maxpower+1):
+        
+        npoints = 10**power
+        x, y = rng.normal(size=(2, npoints))
+        bad = rng.random(npoints)<0.05
+        x[bad] *= 20
+        
+        times = []
+        for estimator in estimators:
+            t0 = time.perf_counter()
+            toolbox.clip2d(x, y, 3, estimator=estimator)
+            times.append(time.perf_counter()-t0)
+        
+        print("  {:>10}".format(npoints) \
+            + "".join(" {:>9.3f}s".format(t) for t in times))
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
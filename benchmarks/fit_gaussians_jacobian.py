@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -----------------------------------------------------------------------------
+# BENCHMARKS.FIT_GAUSSIANS_JACOBIAN
+# Laura L Watkins [lauralwatkins@gmail.com]
+# -----------------------------------------------------------------------------
+
+"""
+Run time of Fit2Gaussians and Fit3Gaussians, which use the fused models with
+analytic Jacobians, against the same fits done with scipy.stats.norm.pdf
+models and finite-difference Jacobians. Each fit is repeated nrep times.
+
+USAGE
+  python benchmarks/fit_gaussians_jacobian.py [nrep]
+"""
+
+from __future__ import division, print_function
+import sys
+import time
+import numpy as np
+from scipy import optimize, stats
+import toolbox
+
+
+def norm2(x, m1, s1, m2, s2, f1):
+    return f1*stats.norm.pdf(x, m1, s1) + (1-f1)*stats.norm.pdf(x, m2, s2)
+
+
+def norm3(x, m1, s1, m2, s2, m3, s3, f1, f2):
+    return f1*stats.norm.pdf(x, m1, s1) + f2*stats.norm.pdf(x, m2, s2) \
+        + (1-f1-f2)*stats.norm.pdf(x, m3, s3)
+
+
+def finite_difference(model, data, p0):
+    
+    # same histogram, starting point and bounds as the toolbox fitters
+    yh, lims = np.histogram(data, bins=100, density=True)
+    xh = (lims[1:] + lims[:-1])/2
+    binsize = (lims[-1]-lims[0])/100
+    k = (len(p0)+1)//3
+    lower = [-np.inf, 3*binsize]*k + [0]*(k-1)
+    upper = [np.inf, np.inf]*k + [1]*(k-1)
+    
+    return optimize.curve_fit(model, xh, yh, p0, bounds=(lower, upper))
+
+
+def main(nrep=20):
+    
+    rng = np.random.default_rng(42)
+    data2 = np.concatenate([rng.normal(-1, 0.5, 6000),
+        rng.normal(2, 1.2, 4000)])
+    data3 = np.concatenate([data2, rng.normal(6, 0.4, 3000)])
+    
+    m, s = data2.mean(), data2.std()
+    p02 = [m-s/2, s, m+s/2, s, 0.5]
+    m, s = data3.mean(), data3.std()
+    p03 = [m-s/2, s, m, s, m+s/2, s, 1/3, 1/3]
+    
+    print("\nmixture fit time per fit")
+    print("  {:>14} {:>12} {:>12}".format("fitter", "analytic", "finite"))
+    
+    for name, fit, model, data, p0 in (
+        ("Fit2Gaussians", toolbox.Fit2Gaussians, norm2, data2, p02),
+        ("Fit3Gaussians", toolbox.Fit3Gaussians, norm3, data3, p03)):
+        
+        t0 = time.perf_counter()
+        for i in range(nrep): fit(data)
+        t1 = time.perf_counter()
+        for i in range(nrep): finite_difference(model, data, p0)
+        t2 = time.perf_counter()
+        
+        print("  {:>14} {:>11.2f}ms {:>11.2f}ms".format(name,
+            (t1-t0)/nrep*1e3, (t2-t1)/nrep*1e3))
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
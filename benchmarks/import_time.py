@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -----------------------------------------------------------------------------
+# BENCHMARKS.IMPORT_TIME
+# Laura L Watkins [lauralwatkins@gmail.com]
+# -----------------------------------------------------------------------------
+
+"""
+Start-up cost of importing toolbox. Each check runs in a fresh interpreter
+and takes the best of several runs. The script exits with an error if
+"import toolbox" pulls in any of the heavy dependencies (numpy, scipy,
+astropy, matplotlib), or if it takes longer than the allowed time over a
+bare interpreter start. It also reports the cost of the lightweight
+functions that short-lived workers use (multigauss and nearest).
+
+USAGE
+  python benchmarks/import_time.py [max_seconds]
+"""
+
+from __future__ import division, print_function
+import subprocess
+import sys
+
+HEAVY = ("numpy", "scipy", "astropy", "matplotlib")
+
+
+def run(code, repeat=5):
+    
+    """
+    Best time to run code in a fresh interpreter, and the heavy modules it
+    imported.
+    """
+    
+    script = "import sys, time\nt0 = time.perf_counter()\n{:}\n" \
+        "print(time.perf_counter()-t0)\n" \
+        "print(' '.join(m for m in {!r} if m in sys.modules))".format(code,
+        HEAVY)
+    best = None
+    for i in range(repeat):
+        out = subprocess.check_output([sys.executable, "-c", script],
+            universal_newlines=True).split("\n")
+        best = float(out[0]) if best is None else min(best, float(out[0]))
+    
+    return best, out[1].split()
+
+
+def main(max_seconds=0.05):
+    
+    print("\nimport time")
+    
+    elapsed, heavy = run("import toolbox")
+    print("  import toolbox: {:.4f}s, heavy modules: {:}".format(elapsed,
+        ", ".join(heavy) or "none"))
+    
+    for name in ("multigauss", "nearest"):
+        t, h = run("import toolbox\ntoolbox.{:}".format(name))
+        print("  toolbox.{:}: {:.4f}s, heavy modules: {:}".format(name, t,
+            ", ".join(h) or "none"))
+    
+    failed = False
+    if heavy:
+        print("FAILED: import toolbox imports {:}".format(", ".join(heavy)))
+        failed = True
+    if elapsed>max_seconds:
+        print("FAILED: import toolbox takes more than {:}s".format(
+            max_seconds))
+        failed = True
+    
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*[float(a) for a in sys.argv[1:]]))
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# -----------------------------------------------------------------------------
+# BENCHMARKS.INTO_PIXELS_WORKERS
+# Laura L Watkins [lauralwatkins@gmail.com]
+# -----------------------------------------------------------------------------
+
+"""
+Scaling of into_pixels with the number of worker processes. The data are
+pixelised once without workers and then with 2 to N workers, checking
+that the results are identical and printing the run time and speedup.
+
+USAGE
+  python benchmarks/into_pixels_workers.py [ndata] [nworkers]
+"""
+
+from __future__ import division, print_function
+import os
+import sys
+import time
+import numpy as np
+import toolbox
+
+
+def main(ndata=10**7, nworkers=None):
+    
+    if not nworkers: nworkers = os.cpu_count()
+    
+    x, y = np.random.default_rng(42).normal(size=(2, ndata))
+    settings = dict(xscale=0.01, yscale=0.01, quiet=True)
+    
+    print("\ninto_pixels scaling: {:} datapoints, {:} cores available"\
+        .format(ndata, os.cpu_count()))
+    
+    t0 = time.perf_counter()
+    pix, data_pix = toolbox.into_pixels(x, y, **settings)
+    serial = time.perf_counter()-t0
+    print("  workers 1: {:.3f}s".format(serial))
+    
+    for workers in range(2, nworkers+1):
+        t0 = time.perf_counter()
+        ppix, pdata_pix = toolbox.into_pixels(x, y, workers=workers,
+            **settings)
+        elapsed = time.perf_counter()-t0
+        same = np.array_equal(pix["N"], ppix["N"]) \
+            and np.array_equal(data_pix, pdata_pix)
+        print("  workers {:}: {:.3f}s, speedup {:.2f}, identical {:}".format(
+            workers, elapsed, serial/elapsed, same))
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
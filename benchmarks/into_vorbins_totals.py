@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -----------------------------------------------------------------------------
+# BENCHMARKS.INTO_VORBINS_TOTALS
+# Laura L Watkins [lauralwatkins@gmail.com]
+# -----------------------------------------------------------------------------
+
+"""
+Run time of the per-bin housekeeping in into_vorbins (number of datapoints,
+signal and noise in each bin) as a function of the number of bins and the
+number of datapoints. The grouped reductions used by into_vorbins are
+compared with the per-bin loops they replaced, which are only run while
+they take a reasonable time.
+
+USAGE
+  python benchmarks/into_vorbins_totals.py
+"""
+
+from __future__ import division, print_function
+import time
+import numpy as np
+from toolbox.into_vorbins import _bin_totals
+
+
+def loops(data_bin, pix_bin, pix_signal, pix_noise, nbin):
+    
+    counts = np.array([sum(data_bin==i) for i in range(nbin)])
+    signal = [sum(pix_signal[pix_bin==i]) for i in range(nbin)]
+    noise = [np.sqrt(sum(pix_noise[pix_bin==i]**2)) for i in range(nbin)]
+    
+    return counts, signal, noise
+
+
+def main():
+    
+    rng = np.random.default_rng(42)
+    npix = 10**5
+    
+    print("\ninto_vorbins housekeeping, {:} pixels".format(npix))
+    print("  {:>8} {:>10} {:>10} {:>10}".format("bins", "data", "grouped",
+        "loops"))
+    
+    for nbin in (10**2, 10**3, 10**4):
+        for ndata in (10**5, 10**6, 10**7):
+            
+            pix_bin = rng.integers(0, nbin, npix)
+            pix_signal = rng.random(npix)
+            pix_noise = np.sqrt(pix_signal)
+            data_bin = pix_bin[rng.integers(0, npix, ndata)]
+            
+            t0 = time.perf_counter()
+            _bin_totals(data_bin, pix_bin, pix_signal, pix_noise, nbin)
+            grouped = time.perf_counter()-t0
+            
+            # loops scale as nbins x ndata, so only time the small cases
+            if nbin*ndata<=10**7:
+                t0 = time.perf_counter()
+                loops(data_bin, pix_bin, pix_signal, pix_noise, nbin)
+                looped = "{:.3f}s".format(time.perf_counter()-t0)
+            else: looped = "-"
+            
+            print("  {:>8} {:>10} {:>9.3f}s {:>10}".format(nbin, ndata,
+                grouped, looped))
+
+
+if __name__ == "__main__":
+    main()
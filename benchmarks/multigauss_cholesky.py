@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# -----------------------------------------------------------------------------
+# BENCHMARKS.MULTIGAUSS_CHOLESKY
+# Laura L Watkins [lauralwatkins@gmail.com]
+# -----------------------------------------------------------------------------
+
+"""
+Run time of multigauss, which factorises the covariance matrices with a
+Cholesky decomposition, against the inverse and determinant it used before,
+for 10^3 up to 10^maxpower Gaussians of 2, 3 and 6 dimensions, each
+evaluated at one point.
+
+USAGE
+  python benchmarks/multigauss_cholesky.py [maxpower]
+"""
+
+from __future__ import division, print_function
+import sys
+import time
+import numpy as np
+from toolbox.multigauss import _logpdf_cholesky, _logpdf_inv
+
+
+def main(maxpower=6):
+    
+    rng = np.random.default_rng(42)
+    
+    print("\nmultigauss run time by method")
+    print("  {:>10} {:>4} {:>10} {:>10}".format("gaussians", "dim",
+        "cholesky", "inv/det"))
+    
+    for power in range(3, maxpower+1):
+        for ndim in (2, 3, 6):
+            
+            ngauss = 10**power
+            a = rng.normal(size=(ngauss, ndim, ndim))
+            cov = np.einsum("aij,akj->aik", a, a) + 0.1*np.eye(ndim)
+            mu = rng.normal(size=(ngauss, ndim))
+            x = rng.normal(size=(ngauss, ndim))
+            
+            times = []
+            for method in (_logpdf_cholesky, _logpdf_inv):
+                t0 = time.perf_counter()
+                method(x, mu, cov, True)
+                times.append(time.perf_counter()-t0)
+            
+            print("  {:>10} {:>4}".format(ngauss, ndim) \
+                + "".join(" {:>9.3f}s".format(t) for t in times))
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
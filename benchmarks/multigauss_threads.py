@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# -----------------------------------------------------------------------------
+# BENCHMARKS.MULTIGAUSS_THREADS
+# Laura L Watkins [lauralwatkins@gmail.com]
+# -----------------------------------------------------------------------------
+
+"""
+Run time of multigauss for 10^power Gaussians of 3 dimensions, evaluated in
+chunks of 2^16 Gaussians, as a function of the number of threads, with the
+speedup over a single thread. The speedup can be no larger than the number
+of physical cores.
+
+USAGE
+  python benchmarks/multigauss_threads.py [power] [maxthreads]
+"""
+
+from __future__ import division, print_function
+import os
+import sys
+import time
+import numpy as np
+import toolbox
+
+
+def main(power=6, maxthreads=8):
+    
+    rng = np.random.default_rng(42)
+    ngauss = 10**power
+    ndim = 3
+    a = rng.normal(size=(ngauss, ndim, ndim))
+    cov = np.einsum("aij,akj->aik", a, a) + 0.1*np.eye(ndim)
+    mu = rng.normal(size=(ngauss, ndim))
+    x = rng.normal(size=(ngauss, ndim))
+    out = np.empty(ngauss)
+    
+    print("\nmultigauss run time by number of threads ({:} cpus)".format(
+        os.cpu_count()))
+    print("  {:>8} {:>10} {:>8}".format("threads", "time", "speedup"))
+    
+    threads = 1
+    while threads <= maxthreads:
+        t0 = time.perf_counter()
+        toolbox.multigauss(x, mu, cov, chunk_size=2**16, threads=threads,
+            out=out)
+        t = time.perf_counter()-t0
+        if threads==1: t1 = t
+        print("  {:>8} {:>9.3f}s {:>8.2f}".format(threads, t, t1/t))
+        threads *= 2
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,27 @@
+#!/usr/bin/env python
+
+import numpy as np
+import toolbox
+
+
+def test_clip2d_scalar_test_point():
+    
+    rng = np.random.default_rng(14)
+    x, y = rng.normal(size=(2, 1000))
+    
+    keep, fail, testpass = toolbox.clip2d(x, y, 3, estimator="moments",
+        xtest=0.5, ytest=0.5)
+    assert testpass.shape == (1,)
+    assert testpass.all()
+    
+    keep, fail, testpass = toolbox.clip2d(x, y, 3, estimator="moments",
+        xtest=10., ytest=10.)
+    assert not testpass.any()
+
+
+def test_clip_model_predict_scalar():
+    
+    model = toolbox.ClipModel((0., 0.), (1., 2.))
+    
+    assert model.predict(0.5, 0.5).tolist() == [True]
+    assert model.predict(0.5, 2.5).tolist() == [False]
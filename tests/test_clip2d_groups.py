@@ -0,0 +1,30 @@
+#!/usr/bin/env python
+
+import numpy as np
+import toolbox
+
+
+def test_clip2d_groups_single_member_group():
+    
+    rng = np.random.default_rng(11)
+    x, y = rng.normal(size=(2, 200))
+    x = np.append(x, 5.)
+    y = np.append(y, -3.)
+    groups = np.append(np.zeros(200, dtype="int"), 1)
+    
+    keep, fail = toolbox.clip2d_groups(x, y, 3, groups=groups)
+    
+    assert keep[-1] and not fail[-1]
+    assert keep[:200].sum() > 190
+
+
+def test_clip2d_groups_zero_dispersion_axis():
+    
+    # all points share one x value, so only y is clipped
+    y = np.append(np.linspace(-1, 1, 50), 20.)
+    x = np.full(y.size, 0.1)
+    
+    keep, fail = toolbox.clip2d_groups(x, y, 3, offsets=[0])
+    
+    assert keep[:50].all()
+    assert fail[-1]
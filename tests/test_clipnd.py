@@ -0,0 +1,29 @@
+#!/usr/bin/env python
+
+import numpy as np
+import toolbox
+
+
+def test_clipnd_diagonal_matches_clip2d_moments():
+    
+    rng = np.random.default_rng(13)
+    x, y = rng.normal(size=(2, 20000))
+    bad = rng.random(20000) < 0.05
+    x[bad] *= 10
+    
+    keep2d, fail2d = toolbox.clip2d(x, y, 3, estimator="moments")
+    keepnd, failnd = toolbox.clipnd(np.array([x, y]), 3, diagonal=True)
+    
+    assert np.array_equal(keep2d, keepnd)
+    assert np.array_equal(fail2d, failnd)
+
+
+def test_clipnd_correlated_close_to_clip2d_moments():
+    
+    rng = np.random.default_rng(13)
+    x, y = rng.normal(size=(2, 20000))
+    
+    keep2d, fail2d = toolbox.clip2d(x, y, 3, estimator="moments")
+    keepnd, failnd = toolbox.clipnd(np.array([x, y]), 3)
+    
+    assert abs(keep2d.size-keepnd.size) < 0.01*x.size
@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+
+import numpy as np
+import pytest
+import toolbox
+
+
+def test_dense_pixels_vorbins_matches_dense():
+    
+    pytest.importorskip("voronoi")
+    rng = np.random.default_rng(3)
+    x, y = rng.normal(size=(2, 5000))
+    settings = dict(xscale=0.2, yscale=0.2, xlim=(-4,4), ylim=(-4,4),
+        quiet=True)
+    
+    pix, data_pix = toolbox.into_pixels(x, y, **settings)
+    spix, sdata_pix = toolbox.into_pixels(x, y, sparse=True, **settings)
+    bins, data_bin = toolbox.into_vorbins(data_pix, pix, 10, quiet=True)
+    sbins, sdata_bin = toolbox.into_vorbins(sdata_pix, spix, 10, quiet=True)
+    dense = toolbox.dense_pixels(spix)
+    
+    assert np.array_equal(data_bin, sdata_bin)
+    for col in ("N", "bin", "Nbin"):
+        assert np.array_equal(np.asarray(dense[col]), np.asarray(pix[col]))
+    assert (np.asarray(dense["bin"])[np.asarray(pix["N"])==0] == -1).all()
+
+
+def test_dense_pixels_fill():
+    
+    x = np.array([0.1, 0.2, 3.5])
+    y = np.array([0.1, 0.3, 3.5])
+    pix, data_pix = toolbox.into_pixels(x, y, xscale=1, yscale=1,
+        xlim=(0,4), ylim=(0,4), sparse=True, quiet=True)
+    pix["flag"] = np.ones(len(pix), dtype="int")
+    dense = toolbox.dense_pixels(pix, fill={"flag": 9})
+    
+    assert len(dense) == 16
+    assert dense["N"].sum() == 3
+    assert sorted(set(np.asarray(dense["flag"]))) == [1, 9]
@@ -0,0 +1,27 @@
+#!/usr/bin/env python
+
+import numpy as np
+from scipy import stats
+import toolbox
+from toolbox.GaussGauss import _jacobian as jacobian2
+from toolbox.GaussGaussGauss import _jacobian as jacobian3
+
+
+def test_gaussgauss_matches_norm_pdf():
+    
+    x = np.linspace(-5, 8, 101)
+    expected = 0.6*stats.norm.pdf(x, -1, 0.5) + 0.4*stats.norm.pdf(x, 2, 1.2)
+    
+    assert np.allclose(toolbox.GaussGauss(x, -1, 0.5, 2, 1.2, 0.6), expected)
+
+
+def test_non_positive_width_gives_nan():
+    
+    x = np.linspace(-5, 5, 11)
+    
+    assert np.isnan(toolbox.GaussGauss(x, 0, -1, 1, 1, 0.5)).all()
+    assert np.isnan(toolbox.GaussGauss(x, 0, 1, 1, 0, 0.5)).all()
+    assert np.isnan(toolbox.GaussGaussGauss(x, 0, 1, 1, 1, 2, -1, 0.3,
+        0.3)).all()
+    assert np.isnan(jacobian2(x, 0, -1, 1, 1, 0.5)[:,:2]).all()
+    assert np.isnan(jacobian3(x, 0, 1, 1, 1, 2, -1, 0.3, 0.3)[:,4:6]).all()
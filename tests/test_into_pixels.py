@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+
+import numpy as np
+import toolbox
+from toolbox.into_pixels import _share
+
+
+def _data(tmp_path, ndata=20000):
+    
+    # coordinates in one file, y after x
+    rng = np.random.default_rng(5)
+    data = np.memmap(tmp_path/"data.dat", dtype="float", mode="w+",
+        shape=(2*ndata,))
+    data[:] = rng.normal(size=2*ndata)
+    data.flush()
+    xdata = np.memmap(tmp_path/"data.dat", dtype="float", mode="r",
+        shape=(ndata,))
+    ydata = np.memmap(tmp_path/"data.dat", dtype="float", mode="r",
+        offset=8*ndata, shape=(ndata,))
+    
+    return xdata, ydata
+
+
+def test_into_pixels_workers_memmap(tmp_path):
+    
+    xdata, ydata = _data(tmp_path)
+    ref, ref_pix = toolbox.into_pixels(np.array(xdata), np.array(ydata),
+        nx=10, ny=12, quiet=True)
+    
+    # the memmapped inputs and output are opened from their files
+    shared = []
+    assert _share(xdata, len(xdata), shared)[0] == "file"
+    assert _share(ydata, len(ydata), shared)[0] == "file"
+    assert not shared
+    
+    out = str(tmp_path/"pix.dat")
+    pix, data_pix = toolbox.into_pixels(xdata, ydata, nx=10, ny=12,
+        workers=2, out=out, quiet=True)
+    
+    assert isinstance(data_pix, np.memmap)
+    assert np.array_equal(data_pix, ref_pix)
+    assert np.array_equal(np.memmap(out, dtype="int", mode="r"), ref_pix)
+    assert np.array_equal(pix["N"], ref["N"])
+
+
+def test_into_pixels_workers_in_memory(tmp_path):
+    
+    xdata, ydata = _data(tmp_path)
+    ref, ref_pix = toolbox.into_pixels(np.array(xdata), np.array(ydata),
+        nx=10, ny=12, quiet=True)
+    
+    # slices of a memmap are copied, as their offset is not known
+    grid = toolbox.PixelGrid.from_meta(ref.meta)
+    out = np.empty(len(xdata)-100, dtype="int")
+    pix, data_pix = toolbox.into_pixels(xdata[100:], np.array(ydata[100:]),
+        grid=grid, workers=2, out=out, quiet=True)
+    
+    assert data_pix is out
+    assert np.array_equal(data_pix, ref_pix[100:])
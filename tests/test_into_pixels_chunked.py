@@ -0,0 +1,31 @@
+#!/usr/bin/env python
+
+import numpy as np
+import toolbox
+
+
+class _Counted(np.ndarray):
+    
+    # counts the number of slices read from the array
+    reads = 0
+    
+    def __getitem__(self, item):
+        if isinstance(item, slice): _Counted.reads += 1
+        return np.asarray(self)[item]
+
+
+def test_into_pixels_chunked_reads_data_twice():
+    
+    rng = np.random.default_rng(1)
+    xdata, ydata = rng.normal(size=(2, 1000))
+    
+    _Counted.reads = 0
+    pix, data_pix = toolbox.into_pixels_chunked(xdata.view(_Counted),
+        ydata.view(_Counted), chunk=100, nx=8, ny=8, quiet=True)
+    
+    # ten chunks of each coordinate, once for the range and once to pixelise
+    assert _Counted.reads == 2*2*10
+    
+    ref, ref_pix = toolbox.into_pixels(xdata, ydata, nx=8, ny=8, quiet=True)
+    assert np.array_equal(data_pix, ref_pix)
+    assert np.array_equal(pix["N"], ref["N"])
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+
+import numpy as np
+import pytest
+import toolbox
+from toolbox.into_vorbins import _previous_bins
+
+
+def _pixels(ndata, seed, **kwargs):
+    
+    rng = np.random.default_rng(seed)
+    x, y = rng.normal(size=(2, ndata))
+    
+    return toolbox.into_pixels(x, y, xscale=0.5, yscale=0.5, xlim=(-4,4),
+        ylim=(-4,4), quiet=True, **kwargs)
+
+
+def test_previous_bins_matched_by_pixel_id():
+    
+    old, old_data_pix = _pixels(200, 1, sparse=True)
+    old["bin"] = np.arange(len(old))
+    new, new_data_pix = _pixels(2000, 2, sparse=True)
+    
+    # pixels in both tables keep their bins, new pixels get -1
+    prev_bin = _previous_bins(new, old, "id")
+    lookup = dict(zip(np.asarray(old["id"]), np.asarray(old["bin"])))
+    expected = [lookup.get(i, -1) for i in np.asarray(new["id"])]
+    assert np.array_equal(prev_bin, expected)
+    assert (prev_bin == -1).any()
+    
+    # same from an (ids, bin) pair, in any order, and for a full table
+    pair = (np.asarray(old["id"])[::-1], np.asarray(old["bin"])[::-1])
+    assert np.array_equal(_previous_bins(new, pair, "id"), prev_bin)
+    full = toolbox.dense_pixels(new)
+    assert np.array_equal(_previous_bins(full, old, "id")[new["id"]],
+        prev_bin)
+
+
+def test_previous_bins_missing(capsys):
+    
+    new, new_data_pix = _pixels(200, 2, sparse=True)
+    
+    assert _previous_bins(new, None, "id") is None
+    assert "ERROR" in capsys.readouterr().out
+
+
+def test_into_vorbins_previous_pixel_table():
+    
+    pytest.importorskip("voronoi")
+    old, old_data_pix = _pixels(5000, 1, sparse=True)
+    bins, data_bin = toolbox.into_vorbins(old_data_pix, old, 10, quiet=True)
+    new, new_data_pix = _pixels(6000, 1, sparse=True)
+    
+    # the new pixel table has no bins, so the warm start needs prevpix
+    assert toolbox.into_vorbins(new_data_pix, new, 10, previous=bins,
+        quiet=True) is None
+    
+    rebins, data_rebin = toolbox.into_vorbins(new_data_pix, new, 10,
+        previous=bins, prevpix=old, quiet=True)
+    assert len(data_rebin) == 6000
+    assert (np.asarray(new["bin"]) >= 0).all()
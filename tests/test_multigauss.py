@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+
+import numpy as np
+import pytest
+from scipy import stats
+import toolbox
+
+
+def _gaussians(ngauss=50, ndim=3, seed=21):
+    
+    rng = np.random.default_rng(seed)
+    a = rng.normal(size=(ngauss, ndim, ndim))
+    cov = np.einsum("aij,akj->aik", a, a) + 0.1*np.eye(ndim)
+    mu = rng.normal(size=(ngauss, ndim))
+    x = rng.normal(size=(ngauss, ndim))
+    
+    return x, mu, cov
+
+
+def _expected(x, mu, cov):
+    
+    return np.array([stats.multivariate_normal(m, c).pdf(p)
+        for p, m, c in zip(x, mu, cov)])
+
+
+def test_multigauss_matches_scipy():
+    
+    x, mu, cov = _gaussians()
+    
+    assert np.allclose(toolbox.multigauss(x, mu, cov), _expected(x, mu, cov))
+
+
+def test_multigauss_shared_mean_row():
+    
+    x, mu, cov = _gaussians()
+    shared = mu[:1]
+    expected = _expected(x, np.repeat(shared, len(x), axis=0), cov)
+    
+    result = toolbox.multigauss(x, shared, cov)
+    assert result.shape == (len(x),)
+    assert np.allclose(result, expected)
+    assert np.allclose(toolbox.multigauss(x, shared, cov, chunk_size=7),
+        expected)
+
+
+def test_multigauss_shared_mean_1d():
+    
+    x, mu, cov = _gaussians()
+    shared = mu[0]
+    expected = _expected(x, np.repeat(shared[None], len(x), axis=0), cov)
+    
+    result = toolbox.multigauss(x, shared, cov)
+    assert result.shape == (len(x),)
+    assert np.allclose(result, expected)
+    
+    # K points per Gaussian, with the shared mean
+    xk = np.stack([x, x[::-1]], axis=1)
+    result = toolbox.multigauss(xk, shared, cov, log=True)
+    assert result.shape == (len(x), 2)
+    assert np.allclose(result[:,0], np.log(expected))
+
+
+def test_multigauss_rows_mismatch():
+    
+    x, mu, cov = _gaussians()
+    
+    with pytest.raises(ValueError):
+        toolbox.multigauss(x, mu[:10], cov)
@@ -0,0 +1,25 @@
+#!/usr/bin/env python
+
+import numpy as np
+import toolbox
+
+
+def test_pixel_grid_locate_edges():
+    
+    grid = toolbox.PixelGrid(nx=4, ny=4, xlim=(0,4), ylim=(0,4))
+    
+    # upper edges go in the last column or row, lower edges in the first
+    ids = grid.locate([4., 0.5, 4., 0., 0.], [0.5, 4., 4., 0., 4.])
+    assert list(ids) == [3, 12, 15, 0, 12]
+    
+    # outside the grid or not a number
+    ids = grid.locate([4.01, -0.01, np.nan, 2.], [2., 2., 2., np.nan])
+    assert list(ids) == [-1, -1, -1, -1]
+
+
+def test_pixel_grid_locate_matches_centres():
+    
+    grid = toolbox.PixelGrid(nx=5, ny=3, xlim=(-1,1), ylim=(0,3))
+    
+    xx, yy = grid.centres()
+    assert np.array_equal(grid.locate(xx, yy), np.arange(grid.npix))
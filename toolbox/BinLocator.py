@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -----------------------------------------------------------------------------
+# TOOLBOX.BINLOCATOR
+# Laura L Watkins [lauralwatkins@gmail.com]
+# -----------------------------------------------------------------------------
+
+from __future__ import division, print_function
+import numpy as np
+from scipy import spatial
+from .PixelGrid import PixelGrid
+
+
+class BinLocator(object):
+    
+    """
+    Find the Voronoi bins of new points, using the bins and pixels from
+    into_vorbins. Points in pixels that were binned are given the bin of
+    their pixel, which is the same as going through the pixel grid with
+    pix["bin"][data_pix]. Other points (in empty pixels or outside the grid)
+    are given the bin with the nearest generator, using a KD-tree of the
+    generators and their scale lengths from voronoi.bin2d.
+    
+    INPUTS
+      bin : bin table from into_vorbins
+      pix : pixel table used by into_vorbins, with its "bin" column
+    
+    OPTIONS
+      x : name for x-coordinate column of bin table [default "x"]
+      y : name for y-coordinate column of bin table [default "y"]
+      pixid : name for pixel ID column of pixel table, only used for sparse
+        pixel tables [default "id"]
+      k : number of nearest generators to compare when searching the
+        KD-tree, to allow for the generator scales [default 8]
+    """
+    
+    def __init__(self, bin, pix, x="x", y="y", pixid="id", k=8):
+        
+        self.grid = PixelGrid.from_meta(pix.meta)
+        self.pix_bin = np.asarray(pix["bin"])
+        self.ids = np.asarray(pix[pixid]) if pix.meta.get("sparse") \
+            else None
+        
+        # generators on the pixel scale, as used by voronoi.bin2d
+        x0, y0 = self.grid.centres(0)
+        self.x0 = x0
+        self.y0 = y0
+        gx = (np.asarray(bin[x])-x0)/self.grid.xscale
+        gy = (np.asarray(bin[y])-y0)/self.grid.yscale
+        self.scale = np.asarray(bin.meta.get("scale", np.ones(len(bin))))
+        self.tree = spatial.cKDTree(np.column_stack([gx, gy]))
+        self.k = min(k, len(bin))
+    
+    
+    def locate(self, x, y, fill=True, chunk=1000000):
+        
+        """
+        Bin ID number of each point.
+        
+        INPUTS
+          x : first coordinate of points
+          y : second coordinate of points
+        
+        OPTIONS
+          fill : give points that are not in a binned pixel the bin with the
+            nearest generator? if not, they are given -1 [default True]
+          chunk : number of points to do at a time [default 1000000]
+        """
+        
+        x = np.asarray(x)
+        y = np.asarray(y)
+        result = np.empty(len(x), dtype="int")
+        
+        for i in range(0, len(x), chunk):
+            xc = x[i:i+chunk]
+            yc = y[i:i+chunk]
+            bins = self._pixel_bins(self.grid.locate(xc, yc))
+            if fill:
+                missing = bins<0
+                if missing.any():
+                    bins[missing] = self._nearest(xc[missing], yc[missing])
+            result[i:i+chunk] = bins
+        
+        return result
+    
+    
+    def _pixel_bins(self, data_pix):
+        
+        """
+        Bin ID number from the pixel of each point, -1 for points that are
+        not in a binned pixel.
+        """
+        
+        if self.ids is None:
+            inside = (data_pix>=0)&(data_pix<len(self.pix_bin))
+            row = np.where(inside, data_pix, 0)
+        else:
+            row = np.minimum(np.searchsorted(self.ids, data_pix),
+                len(self.ids)-1)
+            inside = (data_pix>=0)&(self.ids[row]==data_pix)
+        
+        return np.where(inside, self.pix_bin[row], -1)
+    
+    
+    def _nearest(self, x, y):
+        
+        """
+        Bin ID number with the nearest generator, in units of the generator
+        scale lengths.
+        """
+        
+        points = np.column_stack([(x-self.x0)/self.grid.xscale,
+            (y-self.y0)/self.grid.yscale])
+        dist, near = self.tree.query(points, k=self.k)
+        if self.k==1: return near
+        best = np.argmin(dist/self.scale[near], axis=1)
+        
+        return near[np.arange(len(near)), best]
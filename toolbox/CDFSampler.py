@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# -----------------------------------------------------------------------------
+# TOOLBOX.CDFSAMPLER
+# Laura L Watkins [lauralwatkins@gmail.com]
+# -----------------------------------------------------------------------------
+
+from __future__ import division, print_function
+import numpy as np
+
+
+class CDFSampler(object):
+    
+    """
+    Draws numbers randomly from an input distribution in a given range, by
+    inverting its cumulative distribution function (CDF). The CDF is built
+    once, when the sampler is created, so drawing again from the same
+    distribution only needs a search of the CDF table and an interpolation.
+    
+    To build the CDF, the distribution is evaluated on a grid of ncdf points
+    and each grid interval is integrated with Simpson's rule. Intervals in
+    which Simpson's rule and the trapezium rule disagree by more than tol
+    (relative to the total integral), that is where the distribution is
+    strongly curved, are split in two, until all intervals agree or until
+    maxlevel rounds of splitting have been done.
+    
+    INPUTS
+      fn_name : function name [*]
+    
+    OPTIONS
+      params  : parameters of the distribution [*][default None]
+      vmin    : lower limit of number range [default 0]
+      vmax    : upper limit of number range [default 1]
+      ncdf    : number of points in the initial CDF grid [default 65]
+      tol     : tolerance for splitting grid intervals [default 1e-6]
+      maxlevel : maximum number of rounds of splitting [default 20]
+      seed    : seed or np.random.Generator for the random numbers
+                [default None]
+    
+    NOTES
+      [*] The function 'fn_name' should calculate the values x of the required
+      function for a given parameter set p, that is fn_name(x,p). It is much
+      faster if it accepts an array of values x, but functions of a single
+      value also work.
+    """
+    
+    def __init__(self, fn_name, params=None, vmin=0., vmax=1., ncdf=65,
+        tol=1e-6, maxlevel=20, seed=None):
+        
+        if params is None: self.fn = lambda x: fn_name(x)
+        else: self.fn = lambda x: fn_name(x, params)
+        self.rng = np.random.default_rng(seed)
+        
+        # grid intervals [a,b] with values of the distribution at a, b and
+        # the midpoint m
+        a = np.linspace(vmin, vmax, max(int(ncdf), 2))
+        fa = self._pdf(a)
+        b, fb = a[1:], fa[1:]
+        a, fa = a[:-1], fa[:-1]
+        
+        done_a, done_area = [], []
+        for level in range(maxlevel+1):
+            
+            m = (a+b)/2.
+            fm = self._pdf(m)
+            simpson = (b-a)*(fa+4*fm+fb)/6.
+            trapezium = (b-a)*(fa+fb)/2.
+            total = simpson.sum() + sum(np.sum(d) for d in done_area)
+            
+            # keep intervals that are integrated well, split the others
+            good = np.abs(simpson-trapezium) <= tol*total
+            if level==maxlevel: good[:] = True
+            done_a.append(a[good])
+            done_area.append(simpson[good])
+            
+            bad = ~good
+            if not bad.any(): break
+            a, fa, b, fb, m, fm = a[bad], fa[bad], b[bad], fb[bad], m[bad], \
+                fm[bad]
+            a, b = np.concatenate([a, m]), np.concatenate([m, b])
+            fa, fb = np.concatenate([fa, fm]), np.concatenate([fm, fb])
+        
+        # normalised CDF at the grid points, in order
+        a = np.concatenate(done_a)
+        area = np.concatenate(done_area)
+        order = np.argsort(a)
+        self.values = np.append(a[order], vmax)
+        cdf = np.concatenate([[0.], np.cumsum(area[order])])
+        if cdf[-1] <= 0: raise ValueError("Distribution has no probability "
+            + "in the range [vmin, vmax].")
+        self.cdf = cdf/cdf[-1]
+        
+        # slope of the inverse CDF in each interval, for the interpolation
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self._slope = np.diff(self.values)/np.diff(self.cdf)
+        self._slope[~np.isfinite(self._slope)] = 0.
+    
+    
+    def _pdf(self, x):
+        
+        """
+        Distribution at an array of values, one value at a time if the
+        function does not accept arrays. Negative values are set to zero.
+        """
+        
+        try:
+            y = np.asarray(self.fn(x), dtype="float")
+            if y.shape != x.shape: raise ValueError
+        except (TypeError, ValueError):
+            y = np.array([self.fn(v) for v in x], dtype="float")
+        
+        return np.maximum(y, 0.)
+    
+    
+    def ppf(self, u):
+        
+        """
+        Inverse of the CDF: values below which a fraction u of the
+        distribution lies.
+        
+        INPUTS
+          u : fractions in [0,1]
+        """
+        
+        u = np.asarray(u, dtype="float")
+        i = np.clip(np.searchsorted(self.cdf, u, side="right"), 1,
+            self.cdf.size-1) - 1
+        
+        return self.values[i] + (u-self.cdf[i])*self._slope[i]
+    
+    
+    def sample(self, num=1, rng=None):
+        
+        """
+        Draws numbers randomly from the distribution.
+        
+        OPTIONS
+          num : number of random numbers to generate [default 1]
+          rng : seed or np.random.Generator to use instead of the one given
+                when the sampler was created [default None]
+        """
+        
+        if rng is None: rng = self.rng
+        else: rng = np.random.default_rng(rng)
+        
+        return self.ppf(rng.random(num))
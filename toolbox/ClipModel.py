@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -----------------------------------------------------------------------------
+# TOOLBOX.CLIPMODEL
+# Laura L Watkins [lauralwatkins@gmail.com]
+# -----------------------------------------------------------------------------
+
+from __future__ import division, print_function
+import numpy as np
+
+
+class ClipModel(object):
+    
+    """
+    Result of a 2D sigma-clipping (see clip2d), which can be used to test
+    whether new datasets would pass or fail the clipping without clipping
+    again. Points pass if they are inside the ellipse with the final centre
+    and semi-axes, that is if ((x-x0)/a)^2 + ((y-y0)/b)^2 < 1.
+    
+    INPUTS
+      centre : (x0, y0) centre of the ellipse
+      axes : (a, b) semi-axes of the ellipse in x and y
+    
+    OPTIONS
+      history : (x0, y0, a, b, number removed) for each iteration of the
+        clipping [default None]
+    """
+    
+    def __init__(self, centre, axes, history=None):
+        
+        self.centre = tuple(centre)
+        self.axes = tuple(axes)
+        self.history = list(history) if history is not None else []
+    
+    
+    def predict(self, x, y, chunk=1000000, threads=None, out=None):
+        
+        """
+        Whether each point would pass the clipping. The points are done in
+        chunks, so x and y can be memmap arrays larger than memory, and the
+        chunks can be shared between threads.
+        
+        INPUTS
+          x : x-coordinates
+          y : y-coordinates
+        
+        OPTIONS
+          chunk : number of points to do at a time [default 1000000]
+          threads : number of threads [default None, no threads]
+          out : boolean array for the results, e.g. a memmap [default None]
+        """
+        
+        x = np.atleast_1d(x)
+        y = np.atleast_1d(y)
+        npoints = len(x)
+        if out is None: out = np.empty(npoints, dtype="bool")
+        
+        def run(start):
+            out[start:start+chunk] = self._inside(x[start:start+chunk],
+                y[start:start+chunk])
+        
+        starts = range(0, npoints, chunk)
+        if threads and threads>1:
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                list(pool.map(run, starts))
+        else:
+            for start in starts: run(start)
+        
+        return out
+    
+    
+    def _inside(self, x, y):
+        
+        """
+        Whether points are inside the ellipse.
+        """
+        
+        x = np.asarray(x)
+        y = np.asarray(y)
+        
+        return ((x-self.centre[0])/self.axes[0])**2 \
+            + ((y-self.centre[1])/self.axes[1])**2 < 1
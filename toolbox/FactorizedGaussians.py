@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -----------------------------------------------------------------------------
+# TOOLBOX.FACTORIZEDGAUSSIANS
+# Laura L Watkins [lauralwatkins@gmail.com]
+# -----------------------------------------------------------------------------
+
+from __future__ import division, print_function
+import numpy as np
+from .multigauss import _factorise, _logpdf_factor
+
+
+class FactorizedGaussians(object):
+    
+    """
+    M multivariate Gaussian covariance matrices of dimension N, factorised
+    once so that the Gaussians can be evaluated many times for different
+    means and points (e.g. with fixed measurement errors in an MCMC
+    likelihood) without factorising the covariance matrices again. The
+    Cholesky factors are stored packed, as an N(N+1)/2 x M array, with the
+    logs of the determinants as an array of length M. The evaluation is the
+    same as in multigauss.
+    
+    INPUTS
+      cov : covariance matrices (M x N x N array), which must be positive
+            definite (a ValueError is raised otherwise)
+    """
+    
+    def __init__(self, cov):
+        
+        cov = np.asarray(cov, dtype="float")
+        self.ngauss, self.ndim = cov.shape[0], cov.shape[-1]
+        self.tril, self.logdet = self._factorise(cov)
+    
+    
+    @staticmethod
+    def _factorise(cov):
+        
+        """
+        Packed Cholesky factors and log determinants of covariance matrices.
+        """
+        
+        try:
+            return _factorise(cov)
+        except np.linalg.LinAlgError:
+            raise ValueError("Covariance matrices must be positive definite.")
+    
+    
+    def update(self, idx, cov):
+        
+        """
+        Replace the covariance matrices of some of the Gaussians, in place.
+        
+        INPUTS
+          idx : indices (or boolean mask) of the Gaussians to replace
+          cov : new covariance matrices (m x N x N array)
+        """
+        
+        tril, logdet = self._factorise(np.asarray(cov, dtype="float"))
+        self.tril[:,idx] = tril
+        self.logdet[idx] = logdet
+    
+    
+    def logpdf(self, x, mu, norm=True):
+        
+        """
+        Log of the Gaussians.
+        
+        INPUTS
+          x  : variable coordinate (M x N array, or M x K x N array for K
+               points per Gaussian, or 1 x K x N array for K points shared
+               by all of the Gaussians)
+          mu : mean of distribution (M x N array)
+        
+        OPTIONS
+          norm : option to normalise distribution [default True]
+        """
+        
+        x = np.asarray(x)
+        mu = np.asarray(mu)
+        if x.ndim == 3 and mu.ndim == 2: mu = mu[:,None,:]
+        
+        return _logpdf_factor(x, mu, self.tril, self.logdet, norm)
+    
+    
+    def pdf(self, x, mu, norm=True):
+        
+        """
+        Gaussians (see logpdf for the inputs).
+        """
+        
+        return np.exp(self.logpdf(x, mu, norm=norm))
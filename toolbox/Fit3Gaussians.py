@@ -2,10 +2,10 @@
 
 import numpy as np
 from scipy import optimize
-from .GaussGaussGauss import GaussGaussGauss
+from .GaussGaussGauss import GaussGaussGauss, _jacobian
 
 
-def Fit3Gaussians(data, bins=100, weights=None):
+def Fit3Gaussians(data, bins=100, weights=None, context=None, key=None):
     
     """
     Fit 3 gaussian profiles to a given distribution. Returns fit and covariance.
@@ -16,12 +16,14 @@ def Fit3Gaussians(data, bins=100, weights=None):
     OPTIONS:
       bins : number of bins in histogram [default 100]
       weights : weights for data values [default None]
+      context : FitContext for warm starts from earlier fits [default None]
+      key : key for this dataset in the context [default None]
     """
     
     # normalised histogram of data
     yh, lims = np.histogram(data, bins=bins, density=True, weights=weights)
     xh = (lims[1:] + lims[:-1])/2
-    binsize = lims.ptp()/bins
+    binsize = (lims[-1]-lims[0])/bins
     
     # calculate mean and dispersion of input data
     m = data.mean()
@@ -32,8 +34,16 @@ def Fit3Gaussians(data, bins=100, weights=None):
     
     # fit mean in [-inf,inf], widths in [binsize,inf] and f in [0,1]
     # widths can't go less than binsize to stop overfitting single spikes
-    p, cov = optimize.curve_fit(GaussGaussGauss, xh, yh, p0,
-        bounds=([-np.inf,3*binsize,-np.inf,3*binsize,-np.inf,3*binsize,0,0],
-        [np.inf,np.inf,np.inf,np.inf,np.inf,np.inf,1,1]))
+    bounds = ([-np.inf,3*binsize,-np.inf,3*binsize,-np.inf,3*binsize,0,0],
+        [np.inf,np.inf,np.inf,np.inf,np.inf,np.inf,1,1])
+    if context is None:
+        p, cov = optimize.curve_fit(GaussGaussGauss, xh, yh, p0,
+            jac=_jacobian, bounds=bounds)
+    else:
+        p0, warm = context.start("Fit3Gaussians", m, s, p0, key=key,
+            bounds=bounds)
+        p, cov, info, msg, ier = optimize.curve_fit(GaussGaussGauss, xh, yh,
+            p0, jac=_jacobian, bounds=bounds, full_output=True)
+        context.finish("Fit3Gaussians", m, s, p, info["nfev"], warm, key=key)
     
     return p, cov
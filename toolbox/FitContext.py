@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# -----------------------------------------------------------------------------
+# TOOLBOX.FITCONTEXT
+# Laura L Watkins [lauralwatkins@gmail.com]
+# -----------------------------------------------------------------------------
+
+from __future__ import division, print_function
+from collections import OrderedDict
+import numpy as np
+
+
+class FitContext(object):
+    
+    """
+    Warm starts for sequences of similar fits (e.g. a time series, or
+    neighbouring spatial bins). Pass the same context to FitGaussian,
+    Fit2Gaussians or Fit3Gaussians and each fit starts from the parameters of
+    an earlier converged fit, instead of from the mean and dispersion of the
+    data. The earlier fit is the one stored under the same key, if a key is
+    given, or otherwise the one for the dataset with the nearest mean and
+    dispersion. It is shifted and scaled by the difference in mean and
+    dispersion between the two datasets, so that only the change in shape
+    is left to the fit. Only the most recently used maxsize fits are kept.
+    
+    The number of fits and of function evaluations are counted separately
+    for cold and warm starts, in the nfits and nfev dictionaries, so the
+    saving can be measured.
+    
+    OPTIONS
+      maxsize : maximum number of fits to keep [default 128]
+    """
+    
+    def __init__(self, maxsize=128):
+        
+        if maxsize < 1: raise ValueError("maxsize must be at least 1.")
+        self.maxsize = int(maxsize)
+        self.fits = OrderedDict()
+        self.nfits = {"cold": 0, "warm": 0}
+        self.nfev = {"cold": 0, "warm": 0}
+        self._count = 0
+    
+    
+    def start(self, fitter, mean, std, p0, key=None, bounds=None):
+        
+        """
+        Starting parameters for a fit, and whether they come from an earlier
+        fit. Returns p0 if there is no earlier fit to use.
+        
+        INPUTS
+          fitter : name of the fitting function
+          mean : mean of the data
+          std : dispersion of the data
+          p0 : default starting parameters
+        
+        OPTIONS
+          key : key for the dataset [default None, use the nearest dataset]
+          bounds : (lower, upper) bounds of the fit parameters [default None]
+        """
+        
+        if key is not None:
+            name = (fitter, key)
+            if name not in self.fits: return p0, False
+        else:
+            name = self._nearest(fitter, mean, std)
+            if name is None: return p0, False
+        
+        self.fits.move_to_end(name)
+        mean0, std0, p = self.fits[name]
+        
+        # move means and widths (pairs before the fractions) to the new data
+        ratio = std/std0 if std0 > 0 else 1.
+        k = (p.size+1)//3
+        p = p.copy()
+        p[:2*k:2] = mean + (p[:2*k:2]-mean0)*ratio
+        p[1:2*k:2] *= ratio
+        if bounds is not None: p = np.clip(p, bounds[0], bounds[1])
+        
+        return p, True
+    
+    
+    def _nearest(self, fitter, mean, std):
+        
+        """
+        Name of the stored fit with the nearest mean and dispersion, in units
+        of the dispersion.
+        """
+        
+        names = [name for name in self.fits if name[0]==fitter]
+        if not names: return
+        
+        stored = np.array([self.fits[name][:2] for name in names])
+        scale = std if std > 0 else 1.
+        distance = np.hypot(stored[:,0]-mean, stored[:,1]-std)/scale
+        
+        return names[int(np.argmin(distance))]
+    
+    
+    def finish(self, fitter, mean, std, p, nfev, warm, key=None):
+        
+        """
+        Store a converged fit and count its function evaluations.
+        
+        INPUTS
+          fitter : name of the fitting function
+          mean : mean of the data
+          std : dispersion of the data
+          p : fitted parameters
+          nfev : number of function evaluations used by the fit
+          warm : was the fit started from an earlier fit?
+        
+        OPTIONS
+          key : key for the dataset [default None]
+        """
+        
+        start = "warm" if warm else "cold"
+        self.nfits[start] += 1
+        self.nfev[start] += int(nfev)
+        
+        # fits without a key are stored under a running number
+        if key is None:
+            key = ("_fit", self._count)
+            self._count += 1
+        
+        name = (fitter, key)
+        self.fits[name] = (mean, std, np.array(p, dtype="float"))
+        self.fits.move_to_end(name)
+        while len(self.fits) > self.maxsize: self.fits.popitem(last=False)
+    
+    
+    def clear(self):
+        
+        """
+        Forget all stored fits and reset the counts.
+        """
+        
+        self.fits.clear()
+        for start in ("cold", "warm"):
+            self.nfits[start] = 0
+            self.nfev[start] = 0
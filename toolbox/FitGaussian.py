@@ -1,11 +1,11 @@
 #!/usr/bin/env python
 
 import numpy as np
-import matplotlib.pyplot as plt
 from scipy import optimize, stats
 
 
-def FitGaussian(data, bins=100, showplot=False, label=None, weights=None):
+def FitGaussian(data, bins=100, showplot=False, label=None, weights=None,
+    context=None, key=None, chunk=None):
     
     """
     Fit a gaussian profile to a given distribution.
@@ -18,19 +18,38 @@ def FitGaussian(data, bins=100, showplot=False, label=None, weights=None):
       showplot : show plot of histogram and fit? [default False]
       label : label for plot axes. [default None]
       weights : weights for data values [default None]
+      context : FitContext for warm starts from earlier fits [default None]
+      key : key for this dataset in the context [default None]
+      chunk : number of datapoints to read at once, to stream data that
+              does not fit in memory (e.g. a np.memmap) [default None, read
+              all data at once]
     """
     
     # normalised histogram of data
-    yh, lims = np.histogram(data, bins=bins, density=True, weights=weights)
+    if chunk is None:
+        yh, lims = np.histogram(data, bins=bins, density=True,
+            weights=weights)
+        m, s = data.mean(), data.std()
+    else:
+        yh, lims, m, s = _stream_histogram(data, bins, weights, int(chunk))
     xh = (lims[1:] + lims[:-1])/2.
     
     # fit gaussian to distribution
-    p0 = np.array([ data.mean(), data.std() ])
-    p, cov = optimize.curve_fit(stats.norm.pdf, xh, yh, p0)
-    p[1:] = abs(p[1:])
+    p0 = np.array([ m, s ])
+    if context is None:
+        p, cov = optimize.curve_fit(stats.norm.pdf, xh, yh, p0)
+        p[1:] = abs(p[1:])
+    else:
+        p0, warm = context.start("FitGaussian", m, s, p0, key=key)
+        p, cov, info, msg, ier = optimize.curve_fit(stats.norm.pdf, xh, yh,
+            p0, full_output=True)
+        p[1:] = abs(p[1:])
+        context.finish("FitGaussian", m, s, p, info["nfev"], warm, key=key)
     
     if showplot:
         
+        import matplotlib.pyplot as plt
+        
         # set up plotting
         plt.rc('font', family='serif')
         plt.rc('text', usetex=True)
@@ -44,12 +63,12 @@ def FitGaussian(data, bins=100, showplot=False, label=None, weights=None):
         fig.subplots_adjust(left=0.15, bottom=0.13, top=0.97, right=0.97)
         
         # plot histogram
-        plt.hist(data, bins=bins, histtype="stepfilled", alpha=0.3,
-            color="grey", normed=True, weights=weights)
+        plt.hist(xh, bins=lims, histtype="stepfilled", alpha=0.3,
+            color="grey", weights=yh)
         plt.plot(xh, yh, "ko", alpha=0.2)
         
         # array for plotting
-        xx = np.linspace(data.min(), data.max(), 201)
+        xx = np.linspace(lims[0], lims[-1], 201)
         
         # fitted double gaussian
         yy = stats.norm.pdf(xx, *p)
@@ -65,3 +84,44 @@ def FitGaussian(data, bins=100, showplot=False, label=None, weights=None):
     
     
     return p, cov
+
+
+def _stream_histogram(data, bins, weights, chunk):
+    
+    """
+    Normalised histogram, mean and dispersion of data read a chunk at a
+    time. The first pass finds the data range and the running mean and
+    variance, the second fills a histogram with fixed edges, so the result
+    matches np.histogram on the full data.
+    """
+    
+    n = len(data)
+    mn, mx = np.inf, -np.inf
+    count, mean, m2 = 0, 0., 0.
+    
+    # range and running moments, merging the moments of each chunk
+    for start in range(0, n, chunk):
+        x = np.asarray(data[start:start+chunk], dtype="float")
+        if not x.size: continue
+        mn = min(mn, x.min())
+        mx = max(mx, x.max())
+        xmean = x.mean()
+        xm2 = np.sum((x-xmean)**2)
+        delta = xmean-mean
+        total = count+x.size
+        mean += delta*x.size/total
+        m2 += xm2 + delta**2*count*x.size/total
+        count = total
+    
+    # histogram with fixed edges, one chunk at a time
+    counts = 0
+    for start in range(0, n, chunk):
+        x = data[start:start+chunk]
+        w = None if weights is None else weights[start:start+chunk]
+        if np.ndim(bins): h, lims = np.histogram(x, bins=bins, weights=w)
+        else: h, lims = np.histogram(x, bins=bins, range=(mn, mx), weights=w)
+        counts = counts + h
+    
+    yh = counts/np.diff(lims)/counts.sum()
+    
+    return yh, lims, mean, np.sqrt(m2/count)
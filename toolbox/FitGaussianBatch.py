@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+
+import numpy as np
+
+
+def FitGaussianBatch(data, groups=None, bins=100, weights=None, maxiter=100,
+    tol=1.49012e-8):
+    
+    """
+    Fit gaussian profiles to many distributions at once. This does the same
+    fit as FitGaussian for each dataset, but all of the histograms are made
+    with one bincount and all of the fits are solved together with a
+    vectorised Levenberg-Marquardt least-squares, so it is much faster for
+    large numbers of datasets. Returns the fits (p) and their covariances
+    (cov), with one row per dataset (in order of group ID, for 1D data).
+    
+    INPUTS:
+      data : input quantity, either a 2D array with one dataset per row, or
+             a 1D array with the datasets identified by groups
+    
+    OPTIONS:
+      groups : group ID number of each value, for 1D data [default None]
+      bins : number of bins in each histogram [default 100]
+      weights : weights for data values, same shape as data [default None]
+      maxiter : maximum number of Levenberg-Marquardt steps [default 100]
+      tol : relative tolerance for convergence [default 1.49012e-8]
+    """
+    
+    # dataset number of each value, from 0
+    data = np.asarray(data, dtype="float")
+    if groups is None:
+        group = np.repeat(np.arange(data.shape[0]), data.shape[1])
+        data = data.ravel()
+    else:
+        group = np.unique(groups, return_inverse=True)[1].ravel()
+    if weights is not None: weights = np.asarray(weights).ravel()
+    ngroups = group.max()+1
+    
+    xh, yh = _histograms(data, group, ngroups, bins, weights)
+    
+    # initial guesses from the mean and dispersion of each dataset
+    count = np.bincount(group, minlength=ngroups)
+    mean = np.bincount(group, weights=data, minlength=ngroups)/count
+    std = np.sqrt(np.bincount(group, weights=(data-mean[group])**2,
+        minlength=ngroups)/count)
+    p = np.column_stack([mean, std])
+    
+    p = _levenberg_marquardt(xh, yh, p, maxiter, tol)
+    
+    # covariance as in curve_fit, scaled by the residual variance
+    f, jac = _gauss(xh, p)
+    res = yh-f
+    jtj = np.einsum("gki,gkj->gij", jac, jac)
+    s_sq = np.sum(res**2, axis=1)/(bins-2)
+    cov = np.linalg.pinv(jtj)*s_sq[:,None,None]
+    
+    p[:,1:] = abs(p[:,1:])
+    
+    return p, cov
+
+
+def _histograms(data, group, ngroups, bins, weights):
+    
+    """
+    Normalised histograms of every dataset, with the same bins as
+    np.histogram (bins equally spaced between the data limits).
+    """
+    
+    lo = np.full(ngroups, np.inf)
+    hi = np.full(ngroups, -np.inf)
+    np.minimum.at(lo, group, data)
+    np.maximum.at(hi, group, data)
+    same = lo==hi
+    lo[same] -= 0.5
+    hi[same] += 0.5
+    edges = np.linspace(lo, hi, bins+1, axis=1)
+    
+    # bin of each value, with the same corrections for rounding at the bin
+    # edges as np.histogram
+    index = ((data-lo[group])/(hi-lo)[group]*bins).astype(np.intp)
+    index[index==bins] -= 1
+    index[data<edges[group,index]] -= 1
+    up = (data>=edges[group,index+1]) & (index!=bins-1)
+    index[up] += 1
+    
+    counts = np.bincount(group*bins+index, weights=weights,
+        minlength=ngroups*bins).reshape(ngroups, bins)
+    widths = np.diff(edges, axis=1)
+    yh = counts/widths/counts.sum(axis=1)[:,None]
+    xh = (edges[:,1:] + edges[:,:-1])/2.
+    
+    return xh, yh
+
+
+def _gauss(x, p):
+    
+    """
+    Gaussian profiles and their derivatives with respect to mean and width.
+    """
+    
+    m = p[:,0,None]
+    s = p[:,1,None]
+    u = (x-m)/s
+    f = np.exp(-0.5*u**2)/(np.sqrt(2*np.pi)*s)
+    jac = np.stack([f*u/s, f*(u**2-1)/s], axis=2)
+    
+    return f, jac
+
+
+def _levenberg_marquardt(x, y, p, maxiter, tol):
+    
+    """
+    Least-squares fits of Gaussian profiles to all histograms at once, with
+    a separate damping factor for each fit. Fits drop out as they converge.
+    """
+    
+    p = p.copy()
+    lam = np.full(len(p), 1e-3)
+    f = _gauss(x, p)[0]
+    ssr = np.sum((y-f)**2, axis=1)
+    active = np.arange(len(p))
+    
+    for i in range(maxiter):
+        
+        xa = x[active]
+        ya = y[active]
+        pa = p[active]
+        f, jac = _gauss(xa, pa)
+        
+        # damped normal equations for the step, solved for each fit
+        jtj = np.einsum("gki,gkj->gij", jac, jac)
+        jtr = np.einsum("gki,gk->gi", jac, ya-f)
+        diag = np.einsum("gii->gi", jtj)
+        damped = jtj + (lam[active,None]*diag)[:,:,None]*np.eye(2)
+        det = damped[:,0,0]*damped[:,1,1] - damped[:,0,1]*damped[:,1,0]
+        step = np.column_stack([
+            damped[:,1,1]*jtr[:,0] - damped[:,0,1]*jtr[:,1],
+            damped[:,0,0]*jtr[:,1] - damped[:,1,0]*jtr[:,0]])/det[:,None]
+        
+        # accept steps that reduce the residuals
+        trial = pa+step
+        with np.errstate(invalid="ignore", over="ignore", divide="ignore"):
+            ssr_trial = np.sum((ya-_gauss(xa, trial)[0])**2, axis=1)
+        better = ssr_trial < ssr[active]
+        p[active[better]] = trial[better]
+        
+        # converged if the residuals or parameters barely change
+        done = better & ((ssr[active]-ssr_trial <= tol*ssr[active]) \
+            | np.all(np.abs(step) <= tol*(np.abs(pa)+tol), axis=1))
+        done |= ~np.isfinite(det) | (det==0)
+        ssr[active[better]] = ssr_trial[better]
+        lam[active] = np.where(better, lam[active]/10., lam[active]*10.)
+        done |= lam[active]>1e16
+        
+        active = active[~done]
+        if not active.size: break
+    
+    return p
@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+
+import numpy as np
+
+
+def FitKGaussians(data, k, weights=None, n_init=5, maxiter=500, tol=1e-8,
+    minwidth=None, chunk=1000000, seed=None):
+    
+    """
+    Fit k gaussian profiles to a given distribution, by maximising the
+    likelihood of the unbinned data with expectation-maximisation, so the
+    result does not depend on a choice of histogram bins. Returns fit and
+    covariance, with the fit in the same order as Fit2Gaussians and
+    Fit3Gaussians: the mean and width of each Gaussian, followed by the
+    fractions of the first k-1 Gaussians. The covariance is the inverse of
+    the observed information matrix (the Hessian of the log-likelihood) at
+    the best fit.
+    
+    INPUTS:
+      data : input quantity
+      k : number of gaussian profiles
+    
+    OPTIONS:
+      weights : weights for data values [default None]
+      n_init : number of initialisations, the best fit is kept [default 5]
+      maxiter : maximum number of iterations for each initialisation
+                [default 500]
+      tol : relative change in log-likelihood for convergence [default 1e-8]
+      minwidth : smallest allowed width, to stop single Gaussians collapsing
+                 onto individual points [default None, 0.001 times the
+                 dispersion of the data]
+      chunk : number of datapoints handled at once [default 1000000]
+      seed : seed or np.random.Generator for the random initialisations
+             [default None]
+    
+    NOTES:
+      The data are only read a chunk at a time, so they can be e.g. a
+      np.memmap that is too large to hold in memory.
+    """
+    
+    rng = np.random.default_rng(seed)
+    n = len(data)
+    if weights is None: wsum = float(n)
+    else: wsum = float(np.sum(weights))
+    
+    # mean and dispersion of input data
+    total = np.zeros(3)
+    for x, w in _chunks(data, weights, chunk):
+        total += [np.sum(w), np.sum(w*x), np.sum(w*x**2)]
+    m = total[1]/total[0]
+    s = np.sqrt(max(total[2]/total[0] - m**2, 0))
+    if minwidth is None: minwidth = 1e-3*s
+    
+    # quantiles are taken from a random sample of large datasets
+    if n > chunk: sample = np.asarray(data[np.sort(rng.choice(n, int(chunk),
+        replace=False))], dtype="float")
+    else: sample = np.asarray(data, dtype="float")
+    
+    best = None
+    for i in range(max(n_init, 1)):
+        
+        # first start spreads the means over the quantiles of the data,
+        # later starts put them on randomly-chosen datapoints
+        if i==0: means = np.quantile(sample, (np.arange(k)+0.5)/k)
+        else: means = np.asarray(data[np.sort(rng.choice(n, k,
+            replace=False))], dtype="float")
+        params = (means, np.full(k, s/np.sqrt(k)), np.full(k, 1./k))
+        
+        params, loglike = _em(data, weights, wsum, params, maxiter, tol,
+            minwidth, chunk)
+        if best is None or loglike > best[1]: best = (params, loglike)
+    
+    means, widths, fractions = best[0]
+    p = np.concatenate([np.column_stack([means, widths]).ravel(),
+        fractions[:-1]])
+    
+    # covariance from the observed information
+    hess = _hessian(data, weights, best[0], chunk)
+    try:
+        cov = np.linalg.inv(-hess)
+    except np.linalg.LinAlgError:
+        cov = np.full((3*k-1, 3*k-1), np.inf)
+    
+    return p, cov
+
+
+def _chunks(data, weights, chunk):
+    
+    """
+    Chunks of the data and their weights.
+    """
+    
+    for start in range(0, len(data), int(chunk)):
+        x = np.asarray(data[start:start+int(chunk)], dtype="float")
+        if weights is None: w = np.ones_like(x)
+        else: w = np.asarray(weights[start:start+int(chunk)], dtype="float")
+        yield x, w
+
+
+def _responsibilities(x, means, widths, fractions):
+    
+    """
+    Probability that each datapoint belongs to each Gaussian, and the log of
+    the mixture density at each datapoint.
+    """
+    
+    u = (x[:,None]-means)/widths
+    logp = -0.5*u**2 - np.log(np.sqrt(2*np.pi)*widths) + np.log(fractions)
+    top = logp.max(axis=1)
+    logsum = top + np.log(np.sum(np.exp(logp-top[:,None]), axis=1))
+    resp = np.exp(logp-logsum[:,None])
+    
+    return resp, u, logsum
+
+
+def _em(data, weights, wsum, params, maxiter, tol, minwidth, chunk):
+    
+    """
+    Expectation-maximisation from one initialisation. The E-step is done a
+    chunk at a time, keeping only the weighted sums needed for the M-step.
+    """
+    
+    means, widths, fractions = params
+    loglike = -np.inf
+    
+    for it in range(maxiter):
+        
+        # E-step: weighted sums of the responsibilities, about the current
+        # means for numerical stability
+        nk = np.zeros_like(means)
+        sx = np.zeros_like(means)
+        sxx = np.zeros_like(means)
+        new = 0.
+        for x, w in _chunks(data, weights, chunk):
+            resp, u, logsum = _responsibilities(x, means, widths, fractions)
+            wr = w[:,None]*resp
+            dx = x[:,None]-means
+            nk += wr.sum(axis=0)
+            sx += np.sum(wr*dx, axis=0)
+            sxx += np.sum(wr*dx**2, axis=0)
+            new += np.sum(w*logsum)
+        
+        # M-step
+        nk = np.maximum(nk, np.finfo(float).tiny)
+        shift = sx/nk
+        means = means + shift
+        widths = np.sqrt(np.maximum(sxx/nk - shift**2, minwidth**2))
+        fractions = np.maximum(nk/wsum, np.finfo(float).tiny)
+        fractions /= fractions.sum()
+        
+        if abs(new-loglike) <= tol*abs(new): break
+        loglike = new
+    
+    # sort the Gaussians by mean, so the output order is reproducible
+    order = np.argsort(means)
+    params = (means[order], widths[order], fractions[order])
+    
+    return params, new
+
+
+def _hessian(data, weights, params, chunk):
+    
+    """
+    Hessian of the log-likelihood with respect to the fit parameters (means,
+    widths and the first k-1 fractions), written in terms of the
+    responsibilities so it is stable far from the Gaussian centres.
+    """
+    
+    means, widths, fractions = params
+    k = len(means)
+    npar = 3*k-1
+    im = np.arange(k)*2
+    iw = im+1
+    jf = 2*k+np.arange(k-1)
+    hess = np.zeros((npar, npar))
+    
+    for x, w in _chunks(data, weights, chunk):
+        
+        resp, u, logsum = _responsibilities(x, means, widths, fractions)
+        
+        # first derivatives of the mixture density, over the density
+        grad = np.zeros((x.size, npar))
+        grad[:,im] = resp*u/widths
+        grad[:,iw] = resp*(u**2-1)/widths
+        grad[:,jf] = resp[:,:-1]/fractions[:-1] - (resp[:,-1]/fractions[-1]
+            )[:,None]
+        
+        # second derivatives of the mixture density, over the density
+        dmm = np.sum(w[:,None]*resp*(u**2-1), axis=0)/widths**2
+        dmw = np.sum(w[:,None]*resp*u*(u**2-3), axis=0)/widths**2
+        dww = np.sum(w[:,None]*resp*(u**4-5*u**2+2), axis=0)/widths**2
+        dfm = np.sum(w[:,None]*resp*u, axis=0)/widths/fractions
+        dfw = np.sum(w[:,None]*resp*(u**2-1), axis=0)/widths/fractions
+        
+        second = np.zeros((npar, npar))
+        second[im,im] = dmm
+        second[im,iw] = second[iw,im] = dmw
+        second[iw,iw] = dww
+        for j in range(k-1):
+            second[jf[j],im[j]] = second[im[j],jf[j]] = dfm[j]
+            second[jf[j],iw[j]] = second[iw[j],jf[j]] = dfw[j]
+            second[jf[j],im[-1]] = second[im[-1],jf[j]] = -dfm[-1]
+            second[jf[j],iw[-1]] = second[iw[-1],jf[j]] = -dfw[-1]
+        
+        hess += second - np.einsum("i,ij,ik->jk", w, grad, grad)
+    
+    return hess
@@ -1,6 +1,6 @@
 #!/usr/bin/env python
 
-from scipy import stats
+import numpy as np
 
 
 def GaussGauss(x, mean1, width1, mean2, width2, fraction1):
@@ -16,8 +16,55 @@ def GaussGauss(x, mean1, width1, mean2, width2, fraction1):
       fraction1: fraction of Gaussian1
     """
     
+    x = np.asarray(x, dtype="float")
+    y = np.empty_like(x)
+    g = np.empty_like(x)
+    
     fraction2 = 1 - fraction1
-    y = fraction1*stats.norm.pdf(x, mean1, width1) \
-        + fraction2*stats.norm.pdf(x, mean2, width2)
+    _gauss(x, mean1, width1, fraction1, y)
+    y += _gauss(x, mean2, width2, fraction2, g)
+    
+    return y[()]
+
+
+def _gauss(x, mean, width, scale, out):
+    
+    """
+    Scaled Gaussian, written into the out buffer. As with norm.pdf, this is
+    nan if the width is not positive.
+    """
+    
+    if not width > 0:
+        out[...] = np.nan
+        return out
+    
+    np.subtract(x, mean, out=out)
+    out /= width
+    out *= out
+    out *= -0.5
+    np.exp(out, out=out)
+    out *= scale/(np.sqrt(2*np.pi)*width)
+    
+    return out
+
+
+def _jacobian(x, mean1, width1, mean2, width2, fraction1):
+    
+    """
+    Derivatives of GaussGauss with respect to each parameter, with one
+    column per parameter (the layout curve_fit expects for jac).
+    """
+    
+    x = np.asarray(x, dtype="float")
+    jac = np.empty((x.size, 5))
+    
+    for i, (mean, width) in enumerate(((mean1, width1), (mean2, width2))):
+        u = (x.ravel()-mean)/width
+        g = np.exp(-0.5*u*u)/(np.sqrt(2*np.pi)*width)
+        if not width > 0: g[:] = np.nan
+        f = fraction1 if i==0 else 1-fraction1
+        jac[:,2*i] = f*g*u/width
+        jac[:,2*i+1] = f*g*(u*u-1)/width
+        jac[:,4] = g if i==0 else jac[:,4]-g
     
-    return y
+    return jac
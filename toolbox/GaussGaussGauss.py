@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 
-from scipy import stats
+import numpy as np
+from .GaussGauss import _gauss
 
 
 def GaussGaussGauss(x, mean1, width1, mean2, width2, mean3, width3, fraction1, fraction2):
@@ -19,9 +20,38 @@ def GaussGaussGauss(x, mean1, width1, mean2, width2, mean3, width3, fraction1, f
       fraction2: fraction of Gaussian2
     """
     
+    x = np.asarray(x, dtype="float")
+    y = np.empty_like(x)
+    g = np.empty_like(x)
+    
     fraction3 = 1 - fraction1 - fraction2
-    y = fraction1*stats.norm.pdf(x, mean1, width1) \
-        + fraction2*stats.norm.pdf(x, mean2, width2) \
-        + fraction3*stats.norm.pdf(x, mean3, width3)
+    _gauss(x, mean1, width1, fraction1, y)
+    y += _gauss(x, mean2, width2, fraction2, g)
+    y += _gauss(x, mean3, width3, fraction3, g)
+    
+    return y[()]
+
+
+def _jacobian(x, mean1, width1, mean2, width2, mean3, width3, fraction1,
+    fraction2):
+    
+    """
+    Derivatives of GaussGaussGauss with respect to each parameter, with one
+    column per parameter (the layout curve_fit expects for jac).
+    """
+    
+    x = np.asarray(x, dtype="float")
+    jac = np.empty((x.size, 8))
+    
+    fractions = (fraction1, fraction2, 1-fraction1-fraction2)
+    for i, (mean, width) in enumerate(((mean1, width1), (mean2, width2),
+        (mean3, width3))):
+        u = (x.ravel()-mean)/width
+        g = np.exp(-0.5*u*u)/(np.sqrt(2*np.pi)*width)
+        if not width > 0: g[:] = np.nan
+        jac[:,2*i] = fractions[i]*g*u/width
+        jac[:,2*i+1] = fractions[i]*g*(u*u-1)/width
+        if i<2: jac[:,6+i] = g
+        else: jac[:,6:] -= g[:,None]
     
-    return y
+    return jac
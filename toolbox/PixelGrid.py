@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -----------------------------------------------------------------------------
+# TOOLBOX.PIXELGRID
+# Laura L Watkins [lauralwatkins@gmail.com]
+# -----------------------------------------------------------------------------
+
+from __future__ import division, print_function
+import numpy as np
+from .into_pixels import _resolve_grid, _centres, _pixel_table, _locate
+
+
+class PixelGrid(object):
+    
+    """
+    A 2D pixel grid, set up once from the same pixel settings as into_pixels
+    and then reused, e.g. to put new sets of datapoints into the same pixels
+    without working out the grid again. The grid properties are stored in
+    the same format as the pixel table metadata written by into_pixels, so a
+    grid can be recovered from a pixel table with PixelGrid.from_meta.
+    
+    OPTIONS
+      xdata : first coordinate of data [default None] (**)
+      ydata : second coordinate of data [default None] (**)
+      nx : number of pixels in x [default None] (*)
+      ny : number of pixels in y [default None] (*)
+      xscale : scale of x pixels [default None] (*)
+      yscale : scale of y pixels [default None] (*)
+      xlim : limits of pixelised area in x [default None] (*)
+      ylim : limits of pixelised area in y [default None] (*)
+      xrange : (min, max) of the x data, instead of xdata [default None] (**)
+      yrange : (min, max) of the y data, instead of ydata [default None] (**)
+    
+    NOTES
+      (*) See into_pixels for the valid combinations of pixel settings. A
+        ValueError is raised if the settings are invalid.
+      (**) The data (or their range) are only needed if the limits are not
+        given, in which case they are used in the same way as in into_pixels.
+    """
+    
+    def __init__(self, xdata=None, ydata=None, nx=None, ny=None, xscale=None,
+        yscale=None, xlim=None, ylim=None, xrange=None, yrange=None):
+        
+        # data ranges are only needed if the limits are not given
+        if not xlim and xrange is None and xdata is not None:
+            xrange = (xdata.min(), xdata.max())
+        if not ylim and yrange is None and ydata is not None:
+            yrange = (ydata.min(), ydata.max())
+        if not xlim and xrange is None and (xscale or nx):
+            raise ValueError("Please provide the x data or limits.")
+        if not ylim and yrange is None and (yscale or ny):
+            raise ValueError("Please provide the y data or limits.")
+        
+        grid = _resolve_grid(xrange, yrange, nx=nx, ny=ny, xscale=xscale,
+            yscale=yscale, xlim=xlim, ylim=ylim)
+        if grid is None: raise ValueError("Invalid pixel settings.")
+        self._set(grid)
+    
+    
+    @classmethod
+    def from_meta(cls, meta):
+        
+        """
+        Recover a pixel grid from the metadata of a pixel table made by
+        into_pixels.
+        
+        INPUTS
+          meta : pixel table metadata
+        """
+        
+        grid = cls.__new__(cls)
+        grid._set(meta)
+        
+        return grid
+    
+    
+    def _set(self, meta):
+        
+        """
+        Set the grid properties from a metadata dictionary.
+        """
+        
+        for key in ("npix", "nx", "ny", "xmin", "xmax", "ymin", "ymax",
+            "xscale", "yscale"):
+            setattr(self, key, meta[key])
+    
+    
+    @property
+    def meta(self):
+        
+        """
+        Grid properties in the format used for the pixel table metadata.
+        """
+        
+        return {
+            "npix": self.npix,
+            "nx": self.nx,
+            "ny": self.ny,
+            "xmin": self.xmin,
+            "xmax": self.xmax,
+            "ymin": self.ymin,
+            "ymax": self.ymax,
+            "xscale": self.xscale,
+            "yscale": self.yscale,
+        }
+    
+    
+    def locate(self, x, y):
+        
+        """
+        Pixel ID number of each point, -1 for points outside the grid. This
+        gives the same pixel IDs as into_pixels.
+        
+        INPUTS
+          x : first coordinate of points
+          y : second coordinate of points
+        """
+        
+        return _locate(x, y, self.meta)
+    
+    
+    def centres(self, ids=None):
+        
+        """
+        The x and y centres of pixels.
+        
+        OPTIONS
+          ids : pixel ID numbers [default None, all pixels in the grid]
+        """
+        
+        xx, yy = _centres(self.meta)
+        if ids is None: ids = np.arange(self.npix)
+        ids = np.asarray(ids)
+        
+        return xx[ids % self.nx], yy[ids // self.nx]
+    
+    
+    def to_table(self, x="x", y="y", id="id"):
+        
+        """
+        QTable of all pixels in the grid, with the pixel ID number, x-centre
+        and y-centre, and the grid properties in the metadata.
+        
+        OPTIONS
+          x : name for x-coordinate column of output table [default "x"]
+          y : name for y-coordinate column of output table [default "y"]
+          id : name for pixel ID column of output table [default "id"]
+        """
+        
+        return _pixel_table(self.meta, x=x, y=y, id=id)
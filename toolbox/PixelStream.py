@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -----------------------------------------------------------------------------
+# TOOLBOX.PIXELSTREAM
+# Laura L Watkins [lauralwatkins@gmail.com]
+# -----------------------------------------------------------------------------
+
+from __future__ import division, print_function
+import numpy as np
+from .into_pixels import _report, _count
+from .PixelGrid import PixelGrid
+
+
+class PixelStream(object):
+    
+    """
+    Put a 2D dataset into pixels one chunk at a time, so that the full
+    dataset never needs to be in memory. The pixel grid is fixed when the
+    stream is created, using the same pixel settings as into_pixels or an
+    existing PixelGrid. Chunks
+    are then passed to add(), which returns the pixel ID number of each
+    datapoint in the chunk and updates the number of datapoints in each
+    pixel. Once all chunks have been added, finish() returns the same two
+    objects as into_pixels:
+    1) an astropy QTable for the pixels with the pixel ID number, x-centre,
+       y-centre, and number of objects, with the grid properties in the
+       metadata;
+    2) an array containing the pixel ID number of all datapoints added, in
+       the order they were added.
+    
+    OPTIONS
+      grid : existing PixelGrid to use [default None]
+      nx : number of pixels in x [default None] (*)
+      ny : number of pixels in y [default None] (*)
+      xscale : scale of x pixels [default None] (*)
+      yscale : scale of y pixels [default None] (*)
+      xlim : limits of pixelised area in x [default None] (*)
+      ylim : limits of pixelised area in y [default None] (*)
+      xrange : (min, max) of the x data [default None] (**)
+      yrange : (min, max) of the y data [default None] (**)
+      x : name for x-coordinate column of output table [default "x"]
+      y : name for y-coordinate column of output table [default "y"]
+      id : name for pixel ID column of output table [default "id"]
+      n : name for number of datapoints column of output table [default "N"]
+      out : array into which the pixel ID numbers of the datapoints are
+        written, e.g. an integer np.memmap the length of the full dataset
+        [default None, keep them in memory]
+      quiet : suppress text outputs? [default False]
+    
+    NOTES
+      (*) See into_pixels for the valid combinations of pixel settings. A
+        ValueError is raised if the settings are invalid.
+      (**) The data range is only needed if the limits are not given, in
+        which case it takes the place of the data limits in into_pixels.
+    """
+    
+    def __init__(self, grid=None, nx=None, ny=None, xscale=None, yscale=None,
+        xlim=None, ylim=None, xrange=None, yrange=None, x="x", y="y", id="id",
+        n="N", out=None, quiet=False):
+        
+        if grid is None: grid = PixelGrid(nx=nx, ny=ny, xscale=xscale,
+            yscale=yscale, xlim=xlim, ylim=ylim, xrange=xrange, yrange=yrange)
+        self.grid = grid
+        
+        self.x = x
+        self.y = y
+        self.id = id
+        self.n = n
+        self.out = out
+        
+        # running totals
+        self.counts = np.zeros(grid.npix, dtype="int")
+        self.ndata = 0
+        self.chunks = []
+        
+        if not quiet: _report(grid.meta, x, y)
+    
+    
+    def add(self, xdata, ydata):
+        
+        """
+        Add a chunk of data to the pixels. Returns the pixel ID number of
+        each datapoint in the chunk.
+        
+        INPUTS
+          xdata : first coordinate of data chunk
+          ydata : second coordinate of data chunk
+        """
+        
+        data_pix = self.grid.locate(xdata, ydata)
+        self.counts += _count(data_pix, self.grid.npix)
+        
+        # keep pixel ID numbers of the datapoints
+        if self.out is None: self.chunks.append(data_pix)
+        else: self.out[self.ndata:self.ndata+data_pix.size] = data_pix
+        self.ndata += data_pix.size
+        
+        return data_pix
+    
+    
+    def finish(self):
+        
+        """
+        Returns the pixel table and the pixel ID numbers of all datapoints
+        added to the stream (the out array, if one was given).
+        """
+        
+        pix = self.grid.to_table(x=self.x, y=self.y, id=self.id)
+        pix[self.n] = self.counts.copy()
+        
+        if self.out is None:
+            data_pix = np.concatenate(self.chunks) if self.chunks \
+                else np.array([], dtype="int")
+        else:
+            data_pix = self.out[:self.ndata]
+            if isinstance(self.out, np.memmap): self.out.flush()
+        
+        return pix, data_pix
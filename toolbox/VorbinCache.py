@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -----------------------------------------------------------------------------
+# TOOLBOX.VORBINCACHE
+# Laura L Watkins [lauralwatkins@gmail.com]
+# -----------------------------------------------------------------------------
+
+from __future__ import division, print_function
+import hashlib
+import os
+import numpy as np
+
+
+class VorbinCache(object):
+    
+    """
+    On-disk cache of Voronoi binning results for into_vorbins. Each result is
+    stored as an npz file named after a hash of the inputs to the binning
+    (pixel positions, signal, noise, target S/N and settings), so the same
+    inputs always find the same file. The total size of the cache is kept
+    below a limit by deleting the least recently used results.
+    
+    INPUTS
+      path : directory for the cache, created if needed
+    
+    OPTIONS
+      maxsize : maximum total size of the cache in bytes [default 1e9]
+    """
+    
+    def __init__(self, path, maxsize=1e9):
+        
+        self.path = path
+        self.maxsize = maxsize
+        if not os.path.isdir(path): os.makedirs(path)
+    
+    
+    def key(self, *inputs):
+        
+        """
+        Hash of a set of inputs (arrays, numbers or strings).
+        """
+        
+        digest = hashlib.sha256()
+        for item in inputs:
+            unit = getattr(item, "unit", None)
+            item = np.ascontiguousarray(getattr(item, "value", item))
+            digest.update("{:}|{:}|{:}|".format(item.dtype.str, item.shape,
+                unit).encode())
+            digest.update(item.tobytes())
+        
+        return digest.hexdigest()
+    
+    
+    def _file(self, key):
+        
+        return os.path.join(self.path, key+".npz")
+    
+    
+    def get(self, key):
+        
+        """
+        Cached result for a key, as a dictionary of arrays, or None if the
+        key is not in the cache.
+        
+        INPUTS
+          key : hash of the inputs
+        """
+        
+        filename = self._file(key)
+        try:
+            with np.load(filename) as data:
+                result = {k: data[k] for k in data.files}
+        except (IOError, OSError, ValueError):
+            return
+        
+        # mark as recently used
+        os.utime(filename, None)
+        
+        return result
+    
+    
+    def put(self, key, **arrays):
+        
+        """
+        Store a result in the cache, and delete the least recently used
+        results if the cache is too big.
+        
+        INPUTS
+          key : hash of the inputs
+          arrays : arrays to store
+        """
+        
+        filename = self._file(key)
+        temp = "{:}.{:}.tmp.npz".format(filename[:-4], os.getpid())
+        np.savez(temp, **arrays)
+        os.replace(temp, filename)
+        self._evict()
+    
+    
+    def _evict(self):
+        
+        """
+        Delete the least recently used results until the cache fits.
+        """
+        
+        files = [os.path.join(self.path, f) for f in os.listdir(self.path) \
+            if f.endswith(".npz") and ".tmp." not in f]
+        stats = sorted([(os.path.getmtime(f), os.path.getsize(f), f) \
+            for f in files])
+        total = sum(s[1] for s in stats)
+        for mtime, size, filename in stats:
+            if total<=self.maxsize: break
+            os.remove(filename)
+            total -= size
+    
+    
+    def clear(self):
+        
+        """
+        Delete all results in the cache.
+        """
+        
+        for f in os.listdir(self.path):
+            if f.endswith(".npz"): os.remove(os.path.join(self.path, f))
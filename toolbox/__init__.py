@@ -1,26 +1,97 @@
 #!/usr/bin/env python
 
-from .asymgauss import asymgauss
-from .clip2d import clip2d
-from .cov_ellipse import cov_ellipse
-from .covar import covar
-from .ellipse import ellipse
-from .FitGaussian import FitGaussian
-from .Fit2Gaussians import Fit2Gaussians
-from .Fit3Gaussians import Fit3Gaussians
-from .fmttime import fmttime
-from .GaussGauss import GaussGauss
-from .GaussGaussGauss import GaussGaussGauss
-from .into_pixels import into_pixels
-from .into_vorbins import into_vorbins
-from .lims import lims
-from .LinearTransformation import LinearTransformation
-from .minmax import minmax
-from .multigauss import multigauss
-from .nearest import nearest
-from .PercentileErrors import PercentileErrors
-from .PositionAngleRotation import PositionAngleRotation
-from .randbn import randbn
-from .Rotate2d import Rotate2d
-from .Rotate3d import Rotate3d
-from .whsf import whsf
+"""
+A random collection of useful Python functions.
+
+The functions are only imported when they are first used, so importing the
+package is fast and does not pull in astropy, scipy or matplotlib until they
+are needed. Each function lives in the module of the same name.
+"""
+
+import importlib
+import sys
+import types
+
+__all__ = [
+    "asymgauss",
+    "BinLocator",
+    "binstats",
+    "CDFSampler",
+    "clip2d",
+    "clip2d_groups",
+    "clipnd",
+    "ClipModel",
+    "coarsen_pixels",
+    "cov_ellipse",
+    "covar",
+    "dense_pixels",
+    "ellipse",
+    "FactorizedGaussians",
+    "FitContext",
+    "FitGaussian",
+    "FitGaussianBatch",
+    "FitKGaussians",
+    "Fit2Gaussians",
+    "Fit3Gaussians",
+    "fmttime",
+    "GaussGauss",
+    "GaussGaussGauss",
+    "into_pixels",
+    "into_pixels_chunked",
+    "into_vorbins",
+    "lims",
+    "LinearTransformation",
+    "minmax",
+    "mixture_loglike",
+    "multigauss",
+    "nearest",
+    "PercentileErrors",
+    "pixel_centres",
+    "PixelGrid",
+    "pixel_pyramid",
+    "PixelStream",
+    "PositionAngleRotation",
+    "randbn",
+    "Rotate2d",
+    "Rotate3d",
+    "sparse_pixels",
+    "VorbinCache",
+    "whsf",
+]
+
+
+class _LazyPackage(types.ModuleType):
+    
+    """
+    Package module that keeps functions, rather than the modules of the same
+    name, as its attributes. Importing a submodule sets it as an attribute of
+    the package, which would otherwise hide the function.
+    """
+    
+    def __setattr__(self, name, value):
+        if name in __all__ and isinstance(value, types.ModuleType):
+            value = getattr(value, name)
+        super(_LazyPackage, self).__setattr__(name, value)
+
+
+def __getattr__(name):
+    
+    """
+    Import functions when they are first used.
+    """
+    
+    if name in __all__:
+        value = getattr(importlib.import_module("."+name, __name__), name)
+        globals()[name] = value
+        return value
+    
+    raise AttributeError("module '{:}' has no attribute '{:}'".format(
+        __name__, name))
+
+
+def __dir__():
+    
+    return sorted(set(globals()) | set(__all__))
+
+
+sys.modules[__name__].__class__ = _LazyPackage
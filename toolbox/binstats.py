@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -----------------------------------------------------------------------------
+# TOOLBOX.BINSTATS
+# Laura L Watkins [lauralwatkins@gmail.com]
+# -----------------------------------------------------------------------------
+
+from __future__ import division, print_function
+import numpy as np
+
+
+def binstats(ids, nbins, values, stats="mean", weights=None):
+    
+    """
+    Calculate statistics of a quantity in bins (e.g. pixels), given the bin
+    ID number of each datapoint. All of the statistics are calculated with
+    vectorised grouped reductions, without looping over the bins. Datapoints
+    with bin IDs outside the range 0 to nbins-1 are ignored. Returns a
+    dictionary of arrays, one for each statistic, with one value per bin.
+    Bins with no datapoints are given a sum of 0 and nan otherwise.
+    
+    INPUTS
+      ids : bin ID number of each datapoint
+      nbins : number of bins
+      values : quantity for which statistics are required
+    
+    OPTIONS
+      stats : statistic or list of statistics to calculate [default "mean"]
+        "count" : number of datapoints
+        "sum" : sum of values
+        "mean" : mean of values
+        "wmean" : weighted mean of values (weights required)
+        "var" : variance of values
+        "std" : standard deviation of values
+        "min" : minimum value
+        "max" : maximum value
+        "median" : median value
+      weights : weights for values [default None]
+    """
+    
+    if isinstance(stats, str): stats = [stats]
+    for stat in stats:
+        if stat not in ("count", "sum", "mean", "wmean", "var", "std", "min",
+            "max", "median"):
+            raise ValueError("Unknown statistic '{:}'.".format(stat))
+    if "wmean" in stats and weights is None:
+        raise ValueError("Weights are required for the weighted mean.")
+    
+    # keep track of units, if values are quantities
+    unit = getattr(values, "unit", None)
+    if unit is not None: values = values.value
+    if unit is None: unit = 1
+    
+    # datapoints that are inside the bins
+    ids = np.asarray(ids)
+    good = (ids>=0)&(ids<nbins)
+    ids = ids[good]
+    values = np.asarray(values, dtype="float")[good]
+    if weights is not None: weights = np.asarray(weights)[good]
+    
+    count = np.bincount(ids, minlength=nbins)
+    empty = count==0
+    result = {}
+    
+    if "count" in stats: result["count"] = count
+    
+    if set(stats) & set(("sum", "mean", "var", "std")):
+        total = np.bincount(ids, weights=values, minlength=nbins)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = total/count
+        if "sum" in stats: result["sum"] = total*unit
+        if "mean" in stats: result["mean"] = mean*unit
+        
+        # variance about the mean of each bin, for numerical stability
+        if "var" in stats or "std" in stats:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                var = np.bincount(ids, weights=(values-mean[ids])**2,
+                    minlength=nbins)/count
+            if "var" in stats: result["var"] = var*unit**2
+            if "std" in stats: result["std"] = np.sqrt(var)*unit
+    
+    if "wmean" in stats:
+        wtot = np.bincount(ids, weights=weights, minlength=nbins)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            result["wmean"] = np.bincount(ids, weights=weights*values,
+                minlength=nbins)/wtot*unit
+    
+    if "min" in stats:
+        vmin = np.full(nbins, np.inf)
+        np.minimum.at(vmin, ids, values)
+        vmin[empty] = np.nan
+        result["min"] = vmin*unit
+    
+    if "max" in stats:
+        vmax = np.full(nbins, -np.inf)
+        np.maximum.at(vmax, ids, values)
+        vmax[empty] = np.nan
+        result["max"] = vmax*unit
+    
+    # median from a single sort of the values grouped by bin
+    if "median" in stats:
+        order = np.lexsort((values, ids))
+        ordered = values[order]
+        start = np.cumsum(count)-count
+        lo = np.minimum(start+(count-1)//2, max(ids.size-1, 0))
+        hi = np.minimum(start+count//2, max(ids.size-1, 0))
+        median = np.full(nbins, np.nan)
+        if ids.size:
+            median[~empty] = (ordered[lo[~empty]]+ordered[hi[~empty]])/2.
+        result["median"] = median*unit
+    
+    return result
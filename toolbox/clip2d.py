@@ -6,12 +6,14 @@
 
 from __future__ import division, print_function
 import numpy as np
-import matplotlib.pyplot as plt
-import toolbox
+from .ClipModel import ClipModel
+from .FitGaussian import FitGaussian
+from .lims import lims
 
 
 def clip2d(xx, yy, sigma, nmax=10, verbose=False, graph=False,
-    xtest=None, ytest=None, xweights=None, yweights=None):
+    xtest=None, ytest=None, xweights=None, yweights=None, estimator="fit",
+    model=False):
     
     """
     Perform sigma-clipping of a two-dimensional distribution. Optionally,
@@ -30,42 +32,60 @@ def clip2d(xx, yy, sigma, nmax=10, verbose=False, graph=False,
       ytest   : y-coordinates of test data [default None]
       xweights : weights for x values [default None]
       yweights : weights for y values [default None]
+      estimator : how to estimate the centre and dispersion [default "fit"]
+        "fit" : fit a Gaussian to the histogram of the data (FitGaussian)
+        "moments" : (weighted) mean and standard deviation
+        "median" : (weighted) median and 1.4826 x median absolute deviation
+        "biweight" : biweight location and scale (weights are ignored)
+      model : also return the clipping as a ClipModel, to test new data
+        later [default False]
+    
+    The points inside the ellipse satisfy (x/a)^2 + (y/b)^2 < 1, where a and
+    b are sigma times the dispersions in x and y. The points that are kept
+    are tracked with a boolean mask, and keep and fail are returned as the
+    (sorted) indices of the kept and clipped points.
     """
     
+    if estimator not in _ESTIMATORS:
+        raise ValueError("Unknown estimator '{:}'.".format(estimator))
+    estimate = _ESTIMATORS[estimator]
     
     if verbose: print("\nsigma clip at {:} sigma".format(sigma))
     
-    keep = np.array([ int(n) for n in np.linspace(0,len(xx)-1,len(xx)) ])
-    fail = np.array([], dtype="int")
+    # points that have survived the clipping so far
+    mask = np.ones(len(xx), dtype="bool")
+    
+    history = []
     
     count = 1
     nremoved = 1
     while count <= nmax and nremoved > 0:
         
-        x = xx[keep]
-        y = yy[keep]
-        if np.any(xweights): xw = xweights[keep]
+        x = xx[mask]
+        y = yy[mask]
+        if np.any(xweights): xw = xweights[mask]
         else: xw = None
-        if np.any(yweights): yw = yweights[keep]
+        if np.any(yweights): yw = yweights[mask]
         else: yw = None
         
-        # estimate dispersions by fitting gaussian
-        px = toolbox.fit_gauss(x, weights=xw)[0]
-        py = toolbox.fit_gauss(y, weights=yw)[0]
+        # estimate centres and dispersions
+        px = estimate(x, xw)
+        py = estimate(y, yw)
         
         # create elliptical limits from dispersions and clip data
         a = sigma * px[1]
         b = sigma * py[1]
-        phi = np.arctan2(y-py[0],x-px[0])
-        rell = a*b / np.sqrt( (a*np.sin(phi))**2 + (b*np.cos(phi))**2 )
-        r = np.sqrt( (x-px[0])**2 + (y-py[0])**2 )
-        fail = np.append(fail, keep[r>=rell])
-        keep = keep[r<rell]
+        inside = ((x-px[0])/a)**2 + ((y-py[0])/b)**2 < 1
+        mask[mask] = inside
         
-        nremoved = len(x)-np.size(keep)
+        nremoved = len(x)-np.count_nonzero(inside)
+        history.append((px[0], py[0], a, b, nremoved))
         if verbose: print("  {:} ... removed {:}".format(count, nremoved))
         count += 1
     
+    keep = np.flatnonzero(mask)
+    fail = np.flatnonzero(~mask)
+    clip = ClipModel((px[0], py[0]), (a, b), history=history)
     
     if verbose:
         print("  dispersions: {:}|{:} mas/yr".format(px[1],py[1]))
@@ -76,13 +96,13 @@ def clip2d(xx, yy, sigma, nmax=10, verbose=False, graph=False,
     
     # check if test data would pass of fail the clipping
     if np.any(xtest) and np.any(ytest):
-        phi = np.arctan2(ytest-py[0],xtest-px[0])
-        rell = a*b / np.sqrt( (a*np.sin(phi))**2 + (b*np.cos(phi))**2 )
-        r = np.sqrt( (xtest-px[0])**2 + (ytest-py[0])**2 )
-        testpass = np.array([r<rell])
+        testpass = np.array([clip.predict(xtest, ytest)])
+        if np.ndim(xtest)==0 and np.ndim(ytest)==0: testpass = testpass[0]
     
     if graph:
         
+        import matplotlib.pyplot as plt
+        
         # set up plotting
         plt.rc('font', family='serif')
         plt.rc('text', usetex=True)
@@ -93,15 +113,83 @@ def clip2d(xx, yy, sigma, nmax=10, verbose=False, graph=False,
         
         fig = plt.figure(figsize=(4,3))
         fig.subplots_adjust(left=0.13, bottom=0.13, top=0.97, right=0.97)
-        plt.xlim(toolbox.lims(xx))
-        plt.ylim(toolbox.lims(yy))
+        plt.xlim(lims(xx))
+        plt.ylim(lims(yy))
         plt.xlabel(r"$\rm x \; coordinate$")
         plt.ylabel(r"$\rm y \; coordinate$")
         plt.scatter(xx[keep], yy[keep], lw=0, c="k", s=5)
         plt.scatter(xx[fail], yy[fail], lw=0, c="r", s=5)
         plt.show()
     
-    if np.any(xtest) and np.any(ytest):
-        return keep, fail, testpass
-    else:
-        return keep, fail
+    result = (keep, fail)
+    if np.any(xtest) and np.any(ytest): result += (testpass,)
+    if model: result += (clip,)
+    
+    return result
+
+
+def _fit(values, weights):
+    
+    """
+    Centre and dispersion from a Gaussian fit to the histogram.
+    """
+    
+    return FitGaussian(values, weights=weights)[0]
+
+
+def _moments(values, weights):
+    
+    """
+    Centre and dispersion from the (weighted) mean and standard deviation.
+    """
+    
+    mean = np.average(values, weights=weights)
+    
+    return mean, np.sqrt(np.average((values-mean)**2, weights=weights))
+
+
+def _median(values, weights):
+    
+    """
+    Centre and dispersion from the (weighted) median and median absolute
+    deviation, scaled to match the standard deviation of a Gaussian.
+    """
+    
+    centre = _wmedian(values, weights)
+    
+    return centre, 1.4826*_wmedian(np.abs(values-centre), weights)
+
+
+def _wmedian(values, weights):
+    
+    """
+    Weighted median, or the median if there are no weights.
+    """
+    
+    if weights is None: return np.median(values)
+    
+    order = np.argsort(values)
+    cumw = np.cumsum(weights[order])
+    
+    return values[order][np.searchsorted(cumw, cumw[-1]/2.)]
+
+
+def _biweight(values, weights):
+    
+    """
+    Centre and dispersion from the biweight location and scale.
+    """
+    
+    from astropy import stats
+    
+    centre = stats.biweight_location(values)
+    
+    return centre, stats.biweight_scale(values, M=centre)
+
+
+_ESTIMATORS = {
+    "fit": _fit,
+    "moments": _moments,
+    "median": _median,
+    "biweight": _biweight,
+}
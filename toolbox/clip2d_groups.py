@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# -----------------------------------------------------------------------------
+# TOOLBOX.CLIP2D_GROUPS
+# Laura L Watkins [lauralwatkins@gmail.com]
+# -----------------------------------------------------------------------------
+
+from __future__ import division, print_function
+import numpy as np
+
+
+def clip2d_groups(xx, yy, sigma, groups=None, offsets=None, nmax=10,
+    verbose=False, xweights=None, yweights=None):
+    
+    """
+    Perform sigma-clipping of many independent two-dimensional distributions
+    at once. The data for all of the distributions are passed together, with
+    either the group ID number of each point or the offsets at which each
+    group starts. The clipping follows clip2d, with elliptical limits from
+    the dispersions in x and y, but the centres and dispersions are the
+    (weighted) means and standard deviations rather than Gaussian fits, so
+    that all groups can be done together with vectorised operations. Groups
+    drop out once no more points are removed. Returns boolean arrays with
+    one entry per point: whether each point is kept, and whether it fails.
+    
+    INPUTS:
+      xx    : x-coordinates
+      yy    : y-coordinates
+      sigma : number of sigmas at which to clip
+    
+    OPTIONS:
+      groups  : group ID number of each point [default None] (*)
+      offsets : index of the first point of each group, for data sorted by
+                group, with an optional final entry for the end [default
+                None] (*)
+      nmax    : maximum number of iterations [default 10]
+      verbose : print out progress [default False]
+      xweights : weights for x values [default None]
+      yweights : weights for y values [default None]
+    
+    NOTES
+      (*) One of groups or offsets must be given.
+    """
+    
+    xx = np.asarray(xx, dtype="float")
+    yy = np.asarray(yy, dtype="float")
+    npoints = len(xx)
+    
+    # group of each point, numbered from 0
+    if groups is None:
+        if offsets is None:
+            raise ValueError("Please provide groups or offsets.")
+        offsets = np.append(np.asarray(offsets, dtype="int"), npoints)
+        offsets = offsets[:np.argmax(offsets==npoints)+1]
+        group = np.repeat(np.arange(len(offsets)-1), np.diff(offsets))
+    else:
+        group = np.unique(groups, return_inverse=True)[1].ravel()
+    ngroups = group.max()+1 if npoints else 0
+    
+    xw = np.ones(npoints) if xweights is None else np.asarray(xweights)
+    yw = np.ones(npoints) if yweights is None else np.asarray(yweights)
+    
+    if verbose: print("\nsigma clip {:} groups at {:} sigma".format(ngroups,
+        sigma))
+    
+    keep = np.ones(npoints, dtype="bool")
+    active = np.ones(ngroups, dtype="bool")
+    
+    # points still being clipped
+    idx = np.arange(npoints)
+    
+    count = 1
+    while count <= nmax and idx.size:
+        
+        g = group[idx]
+        x = xx[idx]
+        y = yy[idx]
+        
+        # weighted means and dispersions of all groups
+        px = _moments(g, x, xw[idx], ngroups)
+        py = _moments(g, y, yw[idx], ngroups)
+        
+        # elliptical limits from dispersions, (x/a)^2+(y/b)^2 < 1 is the
+        # same test as r < rell in clip2d, without the trigonometry; there
+        # is no clipping along an axis with zero dispersion (e.g. a group
+        # with one point)
+        a = sigma * px[1][g]
+        b = sigma * py[1][g]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rr = np.where(a>0, ((x-px[0][g])/a)**2, 0.) \
+                + np.where(b>0, ((y-py[0][g])/b)**2, 0.)
+        inside = rr < 1
+        
+        # groups that removed nothing have converged and drop out
+        nremoved = np.bincount(g[~inside], minlength=ngroups)
+        keep[idx[~inside]] = False
+        active &= nremoved > 0
+        
+        if verbose: print("  {:} ... removed {:} from {:} groups".format(
+            count, nremoved.sum(), np.sum(nremoved>0)))
+        
+        idx = idx[inside & active[g]]
+        count += 1
+    
+    if verbose:
+        print("  points removed: {:}".format(npoints-keep.sum()))
+        print("  points remaining: {:}".format(keep.sum()))
+        print("")
+    
+    return keep, ~keep
+
+
+def _moments(group, values, weights, ngroups):
+    
+    """
+    Weighted mean and standard deviation of the values in each group.
+    """
+    
+    wtot = np.bincount(group, weights=weights, minlength=ngroups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.bincount(group, weights=weights*values,
+            minlength=ngroups)/wtot
+        var = np.bincount(group, weights=weights*(values-mean[group])**2,
+            minlength=ngroups)/wtot
+    
+    return mean, np.sqrt(var)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -----------------------------------------------------------------------------
+# TOOLBOX.CLIPND
+# Laura L Watkins [lauralwatkins@gmail.com]
+# -----------------------------------------------------------------------------
+
+from __future__ import division, print_function
+import numpy as np
+from scipy import linalg
+from .covar import covar
+
+
+def clipnd(x, sigma, nmax=10, verbose=False, test=None, weights=None,
+    chunk=1000000, diagonal=False):
+    
+    """
+    Perform sigma-clipping of an N-dimensional distribution, using the full
+    covariance matrix, so the clipping limits are ellipsoids that can be
+    correlated between dimensions. At each iteration, the (weighted) mean
+    and covariance (see covar) of the remaining points are calculated, and
+    points with a Mahalanobis distance of sigma or more are clipped. The
+    distances are calculated in chunks from the Cholesky factor of the
+    covariance matrix. Optionally, test whether a given dataset would pass
+    or fail the sigma clipping. Returns the indices of the points that are
+    kept and those that are clipped, and, if there is test data, a boolean
+    array of whether each test point passes.
+    
+    INPUTS
+      x : MxN array of points (M = # dimensions, N = # points)
+      sigma : number of sigmas at which to clip
+    
+    OPTIONS
+      nmax : maximum number of iterations [default 10]
+      verbose : print out progress [default False]
+      test : MxK array of test points [default None]
+      weights : weights for the points, length N [default None]
+      chunk : number of points for which to calculate distances at a time
+        [default 1000000]
+      diagonal : ignore the correlations between dimensions, so that the
+        ellipsoids are aligned with the axes; in 2D this keeps the same
+        points as clip2d with estimator="moments" [default False]
+    """
+    
+    x = np.asarray(x, dtype="float")
+    npoints = x.shape[1]
+    
+    if verbose: print("\nsigma clip in {:} dimensions at {:} sigma".format(
+        x.shape[0], sigma))
+    
+    # points that have survived the clipping so far
+    mask = np.ones(npoints, dtype="bool")
+    
+    count = 1
+    nremoved = 1
+    while count <= nmax and nremoved > 0:
+        
+        xk = x[:,mask]
+        if weights is None: w = None
+        else: w = np.broadcast_to(np.asarray(weights)[mask], xk.shape)
+        
+        # mean, covariance and Cholesky factor of remaining points
+        mu = np.average(xk, axis=1, weights=None if w is None else w[0])
+        cov = covar(xk, w=w)
+        if diagonal: cov = np.diag(np.diag(cov))
+        chol = linalg.cholesky(cov, lower=True)
+        
+        # clip points outside the ellipsoid
+        inside = _mahalanobis2(xk, mu, chol, chunk) < sigma**2
+        mask[mask] = inside
+        
+        nremoved = xk.shape[1]-np.count_nonzero(inside)
+        if verbose: print("  {:} ... removed {:}".format(count, nremoved))
+        count += 1
+    
+    keep = np.flatnonzero(mask)
+    fail = np.flatnonzero(~mask)
+    
+    if verbose:
+        print("  dispersions: {:}".format(np.sqrt(np.diag(cov))))
+        print("  points removed: {:}".format(fail.size))
+        print("  points remaining: {:}".format(keep.size))
+        print("")
+    
+    # check if test data would pass or fail the clipping
+    if test is not None:
+        testpass = _mahalanobis2(np.asarray(test, dtype="float"), mu, chol,
+            chunk) < sigma**2
+        return keep, fail, testpass
+    
+    return keep, fail
+
+
+def _mahalanobis2(x, mu, chol, chunk):
+    
+    """
+    Squared Mahalanobis distance of each point (column of x) from mu, for a
+    covariance matrix with lower Cholesky factor chol.
+    """
+    
+    d2 = np.empty(x.shape[1])
+    for i in range(0, x.shape[1], chunk):
+        z = linalg.solve_triangular(chol, x[:,i:i+chunk]-mu[:,None],
+            lower=True, check_finite=False)
+        d2[i:i+chunk] = np.einsum("ij,ij->j", z, z)
+    
+    return d2
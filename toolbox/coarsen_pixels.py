@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -----------------------------------------------------------------------------
+# TOOLBOX.COARSEN_PIXELS
+# Laura L Watkins [lauralwatkins@gmail.com]
+# -----------------------------------------------------------------------------
+
+from __future__ import division, print_function
+import numpy as np
+from astropy import table
+from .into_pixels import _pixel_table
+
+
+def coarsen_pixels(pix, factor, x="x", y="y", id="id", n="N"):
+    
+    """
+    Make a coarser pixel grid from a pixel table made by into_pixels, by
+    merging blocks of factor x factor pixels and adding up their number of
+    datapoints. This only needs the pixel table, not the data, so it is much
+    faster than putting the data into pixels again. If the number of pixels
+    is not a multiple of the factor, the coarse grid is extended to cover
+    the whole of the original grid. There are two outputs:
+    1) an astropy QTable for the coarse pixels, in the same layout (full or
+       sparse) as the input table, with the grid properties in the metadata;
+    2) an array with the coarse pixel ID number of each row of the input
+       table.
+    
+    INPUTS
+      pix : pixel table
+      factor : number of pixels to merge along each side
+    
+    OPTIONS
+      x : name for x-coordinate column of output table [default "x"]
+      y : name for y-coordinate column of output table [default "y"]
+      id : name for pixel ID column of input/output table [default "id"]
+      n : name for number of datapoints column of input/output table
+        [default "N"]
+    """
+    
+    meta = pix.meta
+    sparse = meta.get("sparse", False)
+    grid = _coarse_grid(meta, factor)
+    
+    # coarse pixel for each input pixel
+    ids = np.asarray(pix[id]) if sparse else np.arange(len(pix))
+    parent = _coarse_ids(ids, meta["nx"], factor, grid["nx"])
+    counts = np.asarray(pix[n])
+    
+    if sparse:
+        cids, inverse = np.unique(parent, return_inverse=True)
+        coarse = table.QTable()
+        coarse[id] = cids
+        coarse[n] = np.bincount(inverse, weights=counts,
+            minlength=len(cids)).astype(counts.dtype)
+        coarse.meta = dict(grid, sparse=True)
+    else:
+        coarse = _pixel_table(grid, x=x, y=y, id=id)
+        coarse[n] = np.bincount(parent, weights=counts,
+            minlength=grid["npix"]).astype(counts.dtype)
+    
+    return coarse, parent
+
+
+def _coarse_grid(meta, factor):
+    
+    """
+    Grid properties of the coarse grid.
+    """
+    
+    nx = -(-meta["nx"] // factor)
+    ny = -(-meta["ny"] // factor)
+    xscale = meta["xscale"]*factor
+    yscale = meta["yscale"]*factor
+    
+    return {
+        "npix": nx*ny,
+        "nx": nx,
+        "ny": ny,
+        "xmin": meta["xmin"],
+        "xmax": meta["xmin"]+nx*xscale,
+        "ymin": meta["ymin"],
+        "ymax": meta["ymin"]+ny*yscale,
+        "xscale": xscale,
+        "yscale": yscale,
+    }
+
+
+def _coarse_ids(ids, nx, factor, ncx):
+    
+    """
+    Coarse pixel ID number for fine pixel ID numbers, keeping -1 for
+    datapoints outside the grid.
+    """
+    
+    ids = np.asarray(ids)
+    
+    return np.where(ids>=0, (ids % nx)//factor + (ids//nx)//factor*ncx, -1)
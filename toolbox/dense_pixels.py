@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -----------------------------------------------------------------------------
+# TOOLBOX.DENSE_PIXELS
+# Laura L Watkins [lauralwatkins@gmail.com]
+# -----------------------------------------------------------------------------
+
+from __future__ import division, print_function
+import numpy as np
+from .into_pixels import _pixel_table
+
+# columns added by into_vorbins, which mark pixels that are not in a bin
+_FILL = {"bin": -1, "Nbin": -1}
+
+
+def dense_pixels(pix, x="x", y="y", id="id", fill=None):
+    
+    """
+    Convert a sparse pixel table made by into_pixels into the full layout,
+    with one row for every pixel in the grid and the pixel centres. Pixels
+    missing from the sparse table are given 0 in integer columns (such as
+    the number of datapoints) and nan in other columns, except for the bin
+    columns added by into_vorbins ("bin" and "Nbin"), which are given -1 as
+    in the full layout.
+    
+    INPUTS
+      pix : sparse pixel table
+    
+    OPTIONS
+      x : name for x-coordinate column of output table [default "x"]
+      y : name for y-coordinate column of output table [default "y"]
+      id : name for pixel ID column of input/output table [default "id"]
+      fill : dictionary of values for missing pixels in named columns, in
+             addition to the bin columns [default None]
+    """
+    
+    if not pix.meta.get("sparse"): return pix
+    
+    meta = dict(pix.meta)
+    del meta["sparse"]
+    dense = _pixel_table(meta, x=x, y=y, id=id)
+    
+    fills = dict(_FILL)
+    if fill: fills.update(fill)
+    
+    # fill in the occupied pixels
+    ids = np.asarray(pix[id])
+    for col in pix.colnames:
+        if col==id: continue
+        value = np.asarray(getattr(pix[col], "value", pix[col]))
+        if col in fills: full = np.full(len(dense), fills[col], value.dtype)
+        elif value.dtype.kind in "iub": full = np.zeros(len(dense),
+            value.dtype)
+        else: full = np.full(len(dense), np.nan)
+        full[ids] = value
+        unit = getattr(pix[col], "unit", None)
+        dense[col] = full if unit is None else full*unit
+    
+    return dense
@@ -7,10 +7,16 @@
 from __future__ import division, print_function
 import numpy as np
 from astropy import table
+from .binstats import binstats
+
+
+# number of datapoints each process puts into pixels at a time
+_CHUNK = 1000000
 
 
 def into_pixels(xdata, ydata, nx=None, ny=None, xscale=None, yscale=None,
-    xlim=None, ylim=None, x="x", y="y", id="id", n="N", quiet=False):
+    xlim=None, ylim=None, x="x", y="y", id="id", n="N", aggregate=None,
+    sparse=False, grid=None, workers=None, out=None, quiet=False):
     
     """
     Put a 2D dataset into pixels. The code returns two objects:
@@ -19,6 +25,8 @@ def into_pixels(xdata, ydata, nx=None, ny=None, xscale=None, yscale=None,
        are also output in the Qtable metadata;
     2) an array containing the pixel ID number of all input objects -- 
        objects outside the limits of the pixel grid are given a pixel ID of -1.
+    For large grids that are mostly empty, there is a sparse option that only
+    keeps the occupied pixels (see NOTES).
     
     INPUTS
       xdata : first coordinate of data (refered to as "x")
@@ -35,6 +43,15 @@ def into_pixels(xdata, ydata, nx=None, ny=None, xscale=None, yscale=None,
       y : name for y-coordinate column of output table [default "y"]
       id : name for pixel ID column of output table [default "id"]
       n : name for number of datapoints column of output table [default "N"]
+      aggregate : data to summarise in each pixel [default None] (**)
+      sparse : only keep occupied pixels? [default False] (***)
+      grid : existing PixelGrid to use instead of the pixel settings
+        [default None]
+      workers : number of processes over which to split the data [default
+        None, do not split] (****)
+      out : filename or array for the pixel ID numbers of the datapoints, a
+        filename is opened as an integer np.memmap [default None, keep them
+        in memory]
       quiet : suppress text outputs? [default False]
     
     NOTES
@@ -58,6 +75,106 @@ def into_pixels(xdata, ydata, nx=None, ny=None, xscale=None, yscale=None,
            behaviour proceeds as case 8.
         8) Number of pixels, pixel scale and limits are all given: the code 
            checks that they are all consistent, and fails if not.
+      (**) A dictionary of {name: (values, stats)} or {name: (values, stats,
+        weights)}, where values (and weights) have one entry per datapoint
+        and stats is one or a list of "count", "sum", "mean", "wmean", "var",
+        "std", "min", "max", "median" (see binstats). The statistics are
+        calculated in one vectorised pass over the data and added to the
+        pixel table as columns called "name_stat".
+      (***) The sparse pixel table only has rows for pixels that contain
+        datapoints, sorted by pixel ID number, and has no pixel centre
+        columns -- the centres can be calculated when needed from the grid
+        properties in the metadata (see pixel_centres). The metadata also
+        has "sparse" set to True. The pixel IDs of the datapoints are the
+        same as for the full grid. See dense_pixels and sparse_pixels to
+        convert between the two layouts.
+      (****) Each process finds the pixel IDs of its share of the data and
+        counts the datapoints in each pixel, and the counts are added up at
+        the end. The results are identical to those with no workers. Data
+        in np.memmap arrays are read by each process straight from the
+        file, and the pixel IDs are written straight to out if it is a
+        filename or an np.memmap. Otherwise the arrays are copied into
+        shared memory, which doubles the memory they need, so for the
+        largest datasets pass the data as np.memmap arrays and give out.
+    """
+    
+    if grid is not None:
+        
+        # grid has already been worked out
+        grid = grid.meta
+    
+    else:
+        
+        # data ranges are only needed if the limits are not given
+        xrange = None if xlim else (xdata.min(), xdata.max())
+        yrange = None if ylim else (ydata.min(), ydata.max())
+        
+        # work out the properties of the pixel grid
+        grid = _resolve_grid(xrange, yrange, nx=nx, ny=ny, xscale=xscale,
+            yscale=yscale, xlim=xlim, ylim=ylim)
+        if grid is None: return
+    
+    if not quiet: _report(grid, x, y)
+    
+    # file for pixel ID numbers of datapoints
+    if isinstance(out, str):
+        out = np.memmap(out, dtype="int", mode="w+", shape=(len(xdata),))
+    
+    # pixel number for each datapoint
+    counts = None
+    if workers and workers>1:
+        data_pix, counts = _locate_parallel(xdata, ydata, grid, workers,
+            count=not sparse, out=out)
+    elif out is not None:
+        out[:] = _locate(xdata, ydata, grid)
+        data_pix = out
+    else:
+        data_pix = _locate(xdata, ydata, grid)
+    
+    if sparse:
+        
+        # occupied pixels and number of datapoints in each
+        inside = (data_pix>=0)&(data_pix<grid["npix"])
+        ids, counts = np.unique(data_pix[inside], return_counts=True)
+        pix = table.QTable()
+        pix[id] = ids
+        pix[n] = counts
+        pix.meta = dict(grid, sparse=True)
+        
+        # row of the table for each datapoint, for statistics
+        data_row = -np.ones(len(data_pix), dtype="int")
+        data_row[inside] = np.searchsorted(ids, data_pix[inside])
+    
+    else:
+        
+        # make QTable for pixels
+        pix = _pixel_table(grid, x=x, y=y, id=id)
+        
+        # number of datapoints in each pixel
+        if counts is None: counts = _count(data_pix, grid["npix"])
+        pix[n] = counts
+        data_row = data_pix
+    
+    # statistics of other quantities in each pixel
+    if aggregate:
+        for name, stats in _aggregate(data_row, len(pix),
+            aggregate).items(): pix[name] = stats
+    
+    return pix, data_pix
+
+
+def _resolve_grid(xrange, yrange, nx=None, ny=None, xscale=None,
+    yscale=None, xlim=None, ylim=None):
+    
+    """
+    Work out the pixel grid from the pixel settings (see into_pixels for the
+    valid combinations). Returns the grid properties as a dictionary, in the
+    format used for the pixel table metadata, or None if the settings are
+    invalid.
+    
+    INPUTS
+      xrange : (min, max) of x data, only used if xlim is not given
+      yrange : (min, max) of y data, only used if ylim is not given
     """
     
     # throw an error if no settings are given for the x pixels
@@ -85,18 +202,18 @@ def into_pixels(xdata, ydata, nx=None, ny=None, xscale=None, yscale=None,
     # calculate limits, if needed
     if not xlim:
         if nx and xscale:
-            xmid = xdata.min()+xdata.ptp()/2.
+            xmid = xrange[0]+(xrange[1]-xrange[0])/2.
             xlim = (xmid-nx/2.*xscale, xmid+nx/2.*xscale)
-        elif not xscale: xlim = (xdata.min(), xdata.max())
-        else: xlim = (np.floor(xdata.min()/xscale)*xscale,
-            np.ceil(xdata.max()/xscale)*xscale)
+        elif not xscale: xlim = (xrange[0], xrange[1])
+        else: xlim = (np.floor(xrange[0]/xscale)*xscale,
+            np.ceil(xrange[1]/xscale)*xscale)
     if not ylim:
         if ny and yscale:
-            ymid = ydata.min()+ydata.ptp()/2.
+            ymid = yrange[0]+(yrange[1]-yrange[0])/2.
             ylim = (ymid-ny/2.*yscale, ymid+ny/2.*yscale)
-        elif not yscale: ylim = (ydata.min(), ydata.max())
-        else: ylim = (np.floor(ydata.min()/yscale)*yscale,
-            np.ceil(ydata.max()/yscale)*yscale)
+        elif not yscale: ylim = (yrange[0], yrange[1])
+        else: ylim = (np.floor(yrange[0]/yscale)*yscale,
+            np.ceil(yrange[1]/yscale)*yscale)
     
     # calculate pixel scale, if needed
     if not xscale: xscale = (xlim[1]-xlim[0])/nx
@@ -127,44 +244,8 @@ def into_pixels(xdata, ydata, nx=None, ny=None, xscale=None, yscale=None,
             +"and pixel numbers are inconsistent.")
         return
     
-    
-    
-    if not quiet:
-        print("\nbin 2D data into pixels")
-        print("")
-        print("  x coordinate: {:}".format(x))
-        print("  y coordinate: {:}".format(y))
-        print("")
-        print("  x scale: {:} /pixel".format(xscale))
-        print("  y scale: {:} /pixel".format(yscale))
-        print("")
-        print("  x limits: {:} to {:}".format(*xlim))
-        print("  y limits: {:} to {:}".format(*ylim))
-        print("")
-        print("  x pixels: {:}".format(nx))
-        print("  y pixels: {:}".format(ny))
-        print("  total pixels: {:}".format(npix))
-    
-    # make QTable for pixels
-    pix = table.QTable()
-    pix[id] = range(npix)
-    
-    # pixel centres
-    xx = np.linspace(xlim[0]/xscale+0.5, xlim[1]/xscale-0.5, nx)*xscale
-    yy = np.linspace(ylim[0]/yscale+0.5, ylim[1]/yscale-0.5, ny)*yscale
-    pix[x], pix[y] = [p.reshape(npix) for p in np.meshgrid(xx,yy)]
-    
-    # pixel number for each datapoint
-    data_pix = (np.round((xdata-xx.min())/xscale) \
-        + np.round((ydata-yy.min())/yscale)*nx).astype(int)
-    data_pix[(xdata<xlim[0])|(xdata>xlim[1])|(ydata<ylim[0])|(ydata>ylim[1])]\
-        = -1
-    
-    # number of datapoints in each pixel
-    pix[n] = np.histogram(data_pix, range=(-0.5,npix-0.5), bins=npix)[0]
-    
-    # put grid properties into metadata
-    pix.meta = {
+    # grid properties, as stored in the pixel table metadata
+    return {
         "npix": npix,
         "nx": nx,
         "ny": ny,
@@ -175,5 +256,223 @@ def into_pixels(xdata, ydata, nx=None, ny=None, xscale=None, yscale=None,
         "xscale": xscale,
         "yscale": yscale,
     }
+
+
+def _report(grid, x, y):
     
-    return pix, data_pix
+    """
+    Print a summary of the pixel grid.
+    """
+    
+    print("\nbin 2D data into pixels")
+    print("")
+    print("  x coordinate: {:}".format(x))
+    print("  y coordinate: {:}".format(y))
+    print("")
+    print("  x scale: {:} /pixel".format(grid["xscale"]))
+    print("  y scale: {:} /pixel".format(grid["yscale"]))
+    print("")
+    print("  x limits: {:} to {:}".format(grid["xmin"], grid["xmax"]))
+    print("  y limits: {:} to {:}".format(grid["ymin"], grid["ymax"]))
+    print("")
+    print("  x pixels: {:}".format(grid["nx"]))
+    print("  y pixels: {:}".format(grid["ny"]))
+    print("  total pixels: {:}".format(grid["npix"]))
+
+
+def _centres(grid):
+    
+    """
+    Centres of the pixel columns (x) and rows (y) of the grid.
+    """
+    
+    xx = np.linspace(grid["xmin"]/grid["xscale"]+0.5,
+        grid["xmax"]/grid["xscale"]-0.5, grid["nx"])*grid["xscale"]
+    yy = np.linspace(grid["ymin"]/grid["yscale"]+0.5,
+        grid["ymax"]/grid["yscale"]-0.5, grid["ny"])*grid["yscale"]
+    
+    return xx, yy
+
+
+def _pixel_table(grid, x="x", y="y", id="id"):
+    
+    """
+    Make the QTable of pixels with ID and centres, and the grid properties in
+    the metadata.
+    """
+    
+    pix = table.QTable()
+    pix[id] = range(grid["npix"])
+    
+    # pixel centres
+    xx, yy = _centres(grid)
+    pix[x], pix[y] = [p.reshape(grid["npix"]) for p in np.meshgrid(xx,yy)]
+    
+    # put grid properties into metadata
+    pix.meta = dict(grid)
+    
+    return pix
+
+
+def _locate(xdata, ydata, grid):
+    
+    """
+    Pixel number of each datapoint, -1 for datapoints outside the grid.
+    """
+    
+    xdata = np.asarray(xdata)
+    ydata = np.asarray(ydata)
+    
+    # lowest pixel centres
+    x0 = (grid["xmin"]/grid["xscale"]+0.5)*grid["xscale"]
+    y0 = (grid["ymin"]/grid["yscale"]+0.5)*grid["yscale"]
+    
+    # column and row of each pixel, points on the upper edges of the grid
+    # go in the last column or row
+    with np.errstate(invalid="ignore"):
+        ix = np.clip(np.round((xdata-x0)/grid["xscale"]), 0, grid["nx"]-1)
+        iy = np.clip(np.round((ydata-y0)/grid["yscale"]), 0, grid["ny"]-1)
+        outside = ~((xdata>=grid["xmin"])&(xdata<=grid["xmax"])\
+            &(ydata>=grid["ymin"])&(ydata<=grid["ymax"]))
+    
+    data_pix = np.where(outside, 0, ix + iy*grid["nx"]).astype(int)
+    
+    return np.where(outside, -1, data_pix)
+
+
+def _aggregate(data_pix, npix, aggregate):
+    
+    """
+    Statistics of quantities in each pixel, from a dictionary of {name:
+    (values, stats)} or {name: (values, stats, weights)}. Returns a
+    dictionary of columns called "name_stat".
+    """
+    
+    columns = {}
+    for name, spec in aggregate.items():
+        values, stats = spec[:2]
+        weights = spec[2] if len(spec)>2 else None
+        for stat, result in binstats(data_pix, npix, values, stats,
+            weights=weights).items():
+            columns["{:}_{:}".format(name, stat)] = result
+    
+    return columns
+
+
+def _locate_parallel(xdata, ydata, grid, workers, count=True, out=None):
+    
+    """
+    Pixel number of each datapoint and number of datapoints in each pixel,
+    splitting the data over a pool of processes. Arrays that are backed by
+    a file (np.memmap) are opened by each process from the file, and other
+    arrays are copied into shared memory. The pixel numbers are written to
+    out if it is given, and the pixel counts from each process are added
+    together.
+    """
+    
+    from concurrent.futures import ProcessPoolExecutor
+    
+    ndata = len(xdata)
+    if out is None: out = np.empty(ndata, dtype="int")
+    
+    # where each process finds the inputs and the output array
+    shared = []
+    try:
+        specs = [_share(xdata, ndata, shared), _share(ydata, ndata, shared),
+            _share(out, ndata, shared, output=True)]
+        
+        # split data into one contiguous slice per process
+        edges = np.linspace(0, ndata, workers+1).astype(int)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_locate_worker, [(specs, ndata, start,
+                stop, grid, count) for start, stop in zip(edges[:-1],
+                edges[1:])]))
+        
+        # pixel numbers written to shared memory rather than to out
+        if specs[2][0] == "shm":
+            out[:] = np.ndarray(ndata, specs[2][2], buffer=shared[-1].buf)
+    finally:
+        for shm in shared:
+            shm.close()
+            shm.unlink()
+    
+    counts = np.sum(parts, axis=0) if count else None
+    
+    return out, counts
+
+
+def _share(a, ndata, shared, output=False):
+    
+    """
+    How a process can open an array for _locate_parallel: from its file if
+    it is an np.memmap of a whole file region, otherwise from a new block of
+    shared memory (added to the list shared), into which the array is copied
+    unless it is the output.
+    """
+    
+    import mmap
+    from multiprocessing import shared_memory
+    
+    # slices of a memmap do not know their offset in the file, so only the
+    # array made by np.memmap itself (with the mmap as its base) is used
+    if isinstance(a, np.memmap) and isinstance(a.base, mmap.mmap) \
+        and a.filename and a.ndim == 1 and a.flags.c_contiguous:
+        return ("file", a.filename, a.dtype.str, a.offset,
+            "r+" if output else "r")
+    
+    a = np.asarray(a)
+    shm = shared_memory.SharedMemory(create=True,
+        size=max(1, ndata*a.dtype.itemsize))
+    shared.append(shm)
+    if not output and a.size:
+        np.ndarray(ndata, a.dtype, buffer=shm.buf)[:] = a
+    
+    return ("shm", shm.name, a.dtype.str, 0, None)
+
+
+def _locate_worker(args):
+    
+    """
+    Pixel numbers and pixel counts for one slice of the data, for
+    _locate_parallel. The slice is done in chunks to keep the temporary
+    arrays small.
+    """
+    
+    from multiprocessing import shared_memory
+    
+    specs, ndata, start, stop, grid, count = args
+    shared = []
+    try:
+        arrays = []
+        for kind, name, dtype, offset, mode in specs:
+            if kind == "file":
+                arrays.append(np.memmap(name, dtype=dtype, mode=mode,
+                    offset=offset, shape=(ndata,)))
+            else:
+                shared.append(shared_memory.SharedMemory(name=name))
+                arrays.append(np.ndarray(ndata, dtype,
+                    buffer=shared[-1].buf))
+        xdata, ydata, data_pix = arrays
+        
+        counts = np.zeros(grid["npix"], dtype="int") if count else None
+        for i in range(start, stop, _CHUNK):
+            j = min(i+_CHUNK, stop)
+            data_pix[i:j] = _locate(xdata[i:j], ydata[i:j], grid)
+            if count: counts += _count(data_pix[i:j], grid["npix"])
+        if isinstance(data_pix, np.memmap): data_pix.flush()
+        del xdata, ydata, data_pix, arrays
+    finally:
+        for shm in shared: shm.close()
+    
+    return counts
+
+
+def _count(data_pix, npix):
+    
+    """
+    Number of datapoints in each pixel.
+    """
+    
+    inside = (data_pix>=0)&(data_pix<npix)
+    
+    return np.bincount(data_pix[inside], minlength=npix)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -----------------------------------------------------------------------------
+# TOOLBOX.INTO_PIXELS_CHUNKED
+# Laura L Watkins [lauralwatkins@gmail.com]
+# -----------------------------------------------------------------------------
+
+from __future__ import division, print_function
+import numpy as np
+from .PixelStream import PixelStream
+
+
+def into_pixels_chunked(xdata, ydata, chunk=1000000, out=None, grid=None,
+    nx=None, ny=None, xscale=None, yscale=None, xlim=None, ylim=None, x="x",
+    y="y", id="id", n="N", quiet=False):
+    
+    """
+    Put a 2D dataset into pixels, reading the data in chunks. This gives the
+    same outputs as into_pixels, but the peak memory depends on the chunk
+    size rather than the size of the dataset, so the data can be on disk
+    (e.g. as np.memmap arrays). If the pixel limits have to be calculated
+    from the data, the data are read twice: once to find the data range and
+    once to put the data into pixels. The code returns two objects:
+    1) an astropy QTable for the pixels with the pixel ID number, x-centre, 
+       y-centre, and number of objects -- the properties of the pixel grid 
+       are also output in the Qtable metadata;
+    2) an array containing the pixel ID number of all input objects -- 
+       objects outside the limits of the pixel grid are given a pixel ID of -1.
+    
+    INPUTS
+      xdata : first coordinate of data (refered to as "x")
+      ydata : second coordinate of data (refered to as "y")
+    
+    OPTIONS
+      chunk : number of datapoints to read at a time [default 1000000]
+      out : filename or array for the pixel ID numbers of the datapoints, a
+        filename is opened as an integer np.memmap [default None, keep them
+        in memory]
+      grid : existing PixelGrid to use instead of the pixel settings
+        [default None]
+      nx : number of pixels in x [default None] (*)
+      ny : number of pixels in y [default None] (*)
+      xscale : scale of x pixels [default None] (*)
+      yscale : scale of y pixels [default None] (*)
+      xlim : limits of pixelised area in x [default None] (*)
+      ylim : limits of pixelised area in y [default None] (*)
+      x : name for x-coordinate column of output table [default "x"]
+      y : name for y-coordinate column of output table [default "y"]
+      id : name for pixel ID column of output table [default "id"]
+      n : name for number of datapoints column of output table [default "N"]
+      quiet : suppress text outputs? [default False]
+    
+    NOTES
+      (*) See into_pixels for the valid combinations of pixel settings.
+    """
+    
+    ndata = len(xdata)
+    starts = range(0, ndata, chunk)
+    
+    # data ranges, if needed to calculate the limits
+    xrange = None
+    yrange = None
+    findx = grid is None and not xlim and ndata
+    findy = grid is None and not ylim and ndata
+    if findx or findy:
+        xmin, xmax, ymin, ymax = np.inf, -np.inf, np.inf, -np.inf
+        for i in starts:
+            if findx:
+                xc = xdata[i:i+chunk]
+                xmin, xmax = min(xmin, xc.min()), max(xmax, xc.max())
+            if findy:
+                yc = ydata[i:i+chunk]
+                ymin, ymax = min(ymin, yc.min()), max(ymax, yc.max())
+        if findx: xrange = (xmin, xmax)
+        if findy: yrange = (ymin, ymax)
+    
+    # file for pixel ID numbers of datapoints
+    if isinstance(out, str):
+        out = np.memmap(out, dtype="int", mode="w+", shape=(ndata,))
+    
+    try:
+        stream = PixelStream(grid=grid, nx=nx, ny=ny, xscale=xscale,
+            yscale=yscale, xlim=xlim, ylim=ylim, xrange=xrange, yrange=yrange,
+            x=x, y=y, id=id, n=n, out=out, quiet=quiet)
+    except ValueError:
+        return
+    
+    for i in starts: stream.add(xdata[i:i+chunk], ydata[i:i+chunk])
+    
+    return stream.finish()
@@ -7,9 +7,18 @@
 from __future__ import division, print_function
 import numpy as np
 from astropy import table, units as u
+from .binstats import binstats
+from .pixel_centres import pixel_centres
+from .VorbinCache import VorbinCache
+
+# outputs of voronoi.bin2d, as stored in the cache
+_CACHED = ("pix_bin", "xbin", "ybin", "sn", "npix", "scale")
+
 
 def into_vorbins(data_pix, pix, targetSN, x="x", y="y", id="id", n="N",
-    npix="Npix", sn="SN", signal=None, noise=None, quiet=False, vquiet=True):
+    npix="Npix", sn="SN", signal=None, noise=None, pixid="id", previous=None,
+    prevpix=None, tol=0.2, maxfrac=0.5, cache=None, quiet=False,
+    vquiet=True):
     
     """
     Put pixels into Voronoi bins. This is a wrapper for voronoi.bin2d (see 
@@ -21,7 +30,11 @@ def into_vorbins(data_pix, pix, targetSN, x="x", y="y", id="id", n="N",
     2) an array containing the bin ID number of all datapoints.
     The code also adds to columns to the input pixel table (pix): "bin" 
     records the bin ID number of the pixels, and "Nbin" records the number of 
-    stars in the bin to which the pixel belongs.
+    stars in the bin to which the pixel belongs. The pixel table can be in
+    the full or the sparse layout (see into_pixels). The scale lengths of the
+    Voronoi generators from voronoi.bin2d are kept in the bin table metadata
+    as "scale" (in pixel units), for finding the bins of new points (see
+    BinLocator).
     
     INPUTS
       data_pix : pixel number of each datapoint
@@ -38,6 +51,19 @@ def into_vorbins(data_pix, pix, targetSN, x="x", y="y", id="id", n="N",
       sn : name for signal-to-noise column of output table [default "SN"]
       signal : name for signal column of input/output table [default None](*)
       noise : name for noise column of input/output table [default None](**)
+      pixid : name for pixel ID column of input table, only used for sparse
+        pixel tables [default "id"]
+      previous : bin table from a previous run, to rebin incrementally
+        [default None] (***)
+      prevpix : bins of the pixels from the previous run, as the previous
+        pixel table or an (ids, bin) pair of pixel ID numbers and bin ID
+        numbers [default None, use the "bin" column of pix] (***)
+      tol : fractional change in bin S/N from targetSN that triggers a
+        rebin of the bin when rebinning incrementally [default 0.2]
+      maxfrac : largest fraction of pixels to rebin incrementally, above
+        which all pixels are rebinned [default 0.5]
+      cache : VorbinCache, or directory for one, in which to look for and
+        store the binning results [default None] (****)
       quiet : suppress text outputs for this code? [default False]
       vquiet : suppress text outputs for Voronoi call? [default True]
     
@@ -46,12 +72,30 @@ def into_vorbins(data_pix, pix, targetSN, x="x", y="y", id="id", n="N",
     (**) The code also assumes that the noise in the pixel is the square-root
     of the signal in the pixel (useful if the signal is the number of objects
     in the pixel), unless a column name is passed for the noise data.
+    (***) For incremental rebinning, the previous bins of the pixels are
+    taken from prevpix, or else from the "bin" column of pix, and the code
+    fails if there are none. They are matched to the pixels by pixel ID
+    number, so a new pixel table (e.g. after adding new observations, or in
+    the sparse layout) can be rebinned from the previous pixel table. Only
+    bins whose S/N is now more than tol away from targetSN (apart from
+    single-pixel bins above the target), bins that have lost all of their
+    pixels, and pixels that were not previously binned are rebinned,
+    together with any bins that touch them. Other bins are kept, with their
+    previous centres. If more than maxfrac of the pixels need rebinning, all
+    pixels are rebinned as normal.
+    (****) The results are keyed by a hash of the pixel positions, signal,
+    noise, targetSN and the pixel number of each datapoint, so identical
+    inputs skip voronoi.bin2d and reuse the stored bins and bin numbers of
+    the datapoints. The cache is not used for incremental rebinning.
     """
     
     import voronoi
     
+    # sparse pixel tables only have the occupied pixels and no centres
+    sparse = pix.meta.get("sparse", False)
+    
     # fail if there are no columns called n, x or y
-    for key in (n, x, y):
+    for key in (n, pixid) if sparse else (n, x, y):
         if key not in pix.colnames:
             print("ERROR: Could not find column '{:}' in pixel table."\
                 .format(key))
@@ -64,47 +108,95 @@ def into_vorbins(data_pix, pix, targetSN, x="x", y="y", id="id", n="N",
     if not noise: pix_noise = np.sqrt(pix[good][signal])
     else: pix_noise = pix[good][noise]
     
+    # pixel centres, and the centre of the lowest pixel in the grid
+    if sparse:
+        xpix, ypix = pixel_centres(pix, id=pixid)
+        xmin, ymin = pixel_centres(pix, ids=0)
+    else:
+        xpix, ypix = pix[x], pix[y]
+        xmin, ymin = pix[x].min(), pix[y].min()
+    
     # need to have pixels on same scale for Voronoi
-    xp = ((pix[x]-pix[x].min())/pix.meta["xscale"])[good]
-    yp = ((pix[y]-pix[y].min())/pix.meta["yscale"])[good]
+    xp = ((xpix-xmin)/pix.meta["xscale"])[good]
+    yp = ((ypix-ymin)/pix.meta["yscale"])[good]
+    
+    # previous bin of each pixel, for incremental rebinning
+    if previous is not None:
+        prev_bin = _previous_bins(pix, prevpix, pixid)
+        if prev_bin is None: return
+    
+    # look for the Voronoi binning in the cache
+    cached = None
+    if cache is not None and previous is None:
+        if not isinstance(cache, VorbinCache): cache = VorbinCache(cache)
+        key = cache.key("bin2d", targetSN, xp, yp, pix_signal, pix_noise,
+            data_pix)
+        cached = cache.get(key)
     
     # do the Voronoi binning
     bin = table.QTable()
+    if cached is not None:
+        binned = tuple(cached[k] for k in _CACHED)
+    elif previous is not None:
+        prev_bin = prev_bin[good]
+        prev_gen = (np.asarray((previous[x]-xmin)/pix.meta["xscale"]),
+            np.asarray((previous[y]-ymin)/pix.meta["yscale"]),
+            np.asarray(previous.meta.get("scale", np.ones(len(previous)))))
+        binned = _rebin(xp, yp, pix_signal, pix_noise, targetSN, prev_bin,
+            prev_gen, tol, maxfrac, vquiet, quiet)
+    else:
+        binned = voronoi.bin2d(xp, yp, pix_signal, pix_noise, targetSN,
+            graphs=False, quiet=vquiet)
     pix["bin"] = -np.ones(len(pix), dtype="int")
-    pix["bin"][good], bin[x], bin[y], bin[sn], bin[npix], vscale \
-        = voronoi.bin2d(xp, yp, pix_signal, pix_noise, targetSN, graphs=False,
-        quiet=vquiet)
+    pix["bin"][good], bin[x], bin[y], bin[sn], bin[npix], vscale = binned
     bin["id"] = range(len(bin))
     
     # adjust bins back to real scale
-    bin[x] = bin[x]*pix.meta["xscale"] + pix[x].min()
-    bin[y] = bin[y]*pix.meta["yscale"] + pix[y].min()
+    bin[x] = bin[x]*pix.meta["xscale"] + xmin
+    bin[y] = bin[y]*pix.meta["yscale"] + ymin
     
     # bin number for each datapoint
-    data_bin = pix["bin"][data_pix]
+    if cached is not None:
+        data_bin = cached["data_bin"]
+    elif sparse:
+        ids = np.asarray(pix[pixid])
+        row = np.minimum(np.searchsorted(ids, data_pix), len(ids)-1)
+        data_bin = np.where((data_pix>=0)&(ids[row]==data_pix),
+            pix["bin"][row], -1)
+    else:
+        data_bin = pix["bin"][data_pix]
+    
+    # store the Voronoi binning in the cache
+    if cache is not None and previous is None and cached is None:
+        cache.put(key, data_bin=data_bin, **dict(zip(_CACHED, binned)))
     
-    # number of datapoints in each bin
-    bin[n] = np.array([sum(data_bin==i) for i in range(len(bin))])
+    # number of datapoints, signal and noise in each bin
+    pix_bin = np.asarray(pix["bin"][good])
+    bin_n, bin_signal, bin_noise = _bin_totals(data_bin, pix_bin, pix_signal,
+        pix_noise, len(bin))
+    bin[n] = bin_n
     
     # reorder columns
     bin = bin[id,x,y,n,npix,sn]
     
+    # scale lengths of the Voronoi generators, to find the bins of new points
+    bin.meta = {"scale": np.asarray(vscale)}
+    
     # make columns to record the signal and noise in each bin
     if signal==n: signal = "signal"
     if not noise: noise = "noise"
-    bin[signal] = [sum(pix_signal[pix[good]["bin"]==b["id"]]) for b in bin]
-    bin[noise] = [np.sqrt(sum(pix_noise[pix[good]["bin"]==b["id"]]**2)) \
-        for b in bin]
+    bin[signal] = bin_signal
+    bin[noise] = bin_noise
     
     # number of datapoints in bin to which pixel belongs
     pix["Nbin"] = -np.ones(len(pix), dtype="int")
-    pix["Nbin"][good] = bin[pix[good]["bin"]][n]
+    pix["Nbin"][good] = bin_n[pix_bin]
     
     # signal and noise in bin to which pixel belongs
     pix[signal+"_bin"] = [np.nan]*len(pix)
     pix[noise+"_bin"] = [np.nan]*len(pix)
-    pix[signal+"_bin"][good] = bin[pix[good]["bin"]][signal]
-    pix[noise+"_bin"][good] = bin[pix[good]["bin"]][noise]
+    pix[signal+"_bin"][good] = bin[signal][pix_bin]
+    pix[noise+"_bin"][good] = bin[noise][pix_bin]
     
     if not quiet:
         print("\nVoronoi binning of pixels\n")
@@ -114,3 +206,171 @@ def into_vorbins(data_pix, pix, targetSN, x="x", y="y", id="id", n="N",
         print("  avg S/N per bin: {:}".format(bin[sn].mean()))
     
     return bin, data_bin
+
+
+def _previous_bins(pix, prevpix, pixid):
+    
+    """
+    Bin ID number of each pixel from a previous run, matched by pixel ID
+    number, -1 for pixels that were not binned. The bins are taken from
+    prevpix (a pixel table or an (ids, bin) pair) or else from the "bin"
+    column of pix. Returns None if there are no previous bins.
+    """
+    
+    if prevpix is None:
+        if "bin" not in pix.colnames:
+            print("ERROR: Please provide the previous bins of the pixels "\
+                + "(prevpix) for incremental rebinning.")
+            return
+        return np.asarray(pix["bin"])
+    
+    if hasattr(prevpix, "colnames"):
+        
+        # previous pixel table, which must be on the same grid
+        if "bin" not in prevpix.colnames:
+            print("ERROR: Could not find column 'bin' in previous pixel "\
+                + "table.")
+            return
+        for key in ("nx", "ny", "xmin", "ymin", "xscale", "yscale"):
+            if key in prevpix.meta and key in pix.meta \
+                and prevpix.meta[key] != pix.meta[key]:
+                print("ERROR: Previous pixel table is on a different grid.")
+                return
+        ids = _pixel_ids(prevpix, pixid)
+        bins = np.asarray(prevpix["bin"])
+    
+    else:
+        ids, bins = (np.asarray(a) for a in prevpix)
+    
+    # look up the pixels in the previous pixel IDs
+    current = _pixel_ids(pix, pixid)
+    if not len(ids): return -np.ones(len(current), dtype="int")
+    order = np.argsort(ids)
+    ids, bins = ids[order], bins[order]
+    row = np.minimum(np.searchsorted(ids, current), len(ids)-1)
+    
+    return np.where(ids[row]==current, bins[row], -1)
+
+
+def _pixel_ids(pix, pixid):
+    
+    """
+    Pixel ID number of each row of a pixel table: the pixid column of a
+    sparse table, or the row number of a full table.
+    """
+    
+    if pix.meta.get("sparse", False): return np.asarray(pix[pixid])
+    
+    return np.arange(len(pix))
+
+
+def _bin_totals(data_bin, pix_bin, pix_signal, pix_noise, nbin):
+    
+    """
+    Number of datapoints, total signal and total noise in each bin, from
+    the bin number of each datapoint and of each (occupied) pixel. Each is
+    a single grouped reduction over the datapoints or pixels.
+    """
+    
+    data_bin = np.asarray(data_bin)
+    counts = np.bincount(data_bin[data_bin>=0], minlength=nbin)
+    signal = binstats(pix_bin, nbin, pix_signal, "sum")["sum"]
+    noise = np.sqrt(binstats(pix_bin, nbin, pix_noise**2, "sum")["sum"])
+    
+    return counts, signal, noise
+
+
+def _rebin(xp, yp, pix_signal, pix_noise, targetSN, prev_bin, prev_gen, tol,
+    maxfrac, vquiet, quiet):
+    
+    """
+    Incremental Voronoi binning, starting from a previous bin assignment of
+    the pixels. Only the bins that no longer meet the target, and the bins
+    around them, are passed to voronoi.bin2d. Returns the same outputs as
+    voronoi.bin2d.
+    """
+    
+    import voronoi
+    
+    xp = np.asarray(xp)
+    yp = np.asarray(yp)
+    signal = np.asarray(getattr(pix_signal, "value", pix_signal),
+        dtype="float")
+    noise = np.asarray(getattr(pix_noise, "value", pix_noise), dtype="float")
+    nprev = len(prev_gen[0])
+    
+    # previous bins, with the current signal and noise
+    old = (prev_bin>=0)&(prev_bin<nprev)
+    prev_bin = np.where(old, prev_bin, -1)
+    bin_npix = np.bincount(prev_bin[old], minlength=nprev)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        bin_sn = np.bincount(prev_bin[old], weights=signal[old],
+            minlength=nprev) / np.sqrt(np.bincount(prev_bin[old],
+            weights=noise[old]**2, minlength=nprev))
+    
+    # bins that no longer meet the target: too low, too high (unless they
+    # are single pixels that cannot be split), or empty
+    frac = bin_sn/targetSN
+    changed = (frac<1-tol) | ((frac>1+tol)&(bin_npix>1)) | (bin_npix==0) \
+        | ~np.isfinite(frac)
+    
+    # pixels to rebin, and pixels that touch them on the grid
+    redo = ~old | changed[prev_bin]
+    ix = np.round(xp).astype(int) + 1
+    iy = np.round(yp).astype(int) + 1
+    width = ix.max() + 2
+    keys = ix + iy*width
+    order = np.argsort(keys)
+    sorted_keys = keys[order]
+    touched = np.zeros(nprev, dtype="bool")
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            nkeys = keys[redo] + dx + dy*width
+            pos = np.minimum(np.searchsorted(sorted_keys, nkeys), len(keys)-1)
+            near = order[pos[sorted_keys[pos]==nkeys]]
+            touched[prev_bin[near][prev_bin[near]>=0]] = True
+    changed |= touched
+    redo = ~old | changed[prev_bin]
+    
+    if not quiet:
+        print("\nincremental Voronoi binning\n")
+        print("  bins to rebin: {:} of {:}".format(changed.sum(), nprev))
+        print("  pixels to rebin: {:} of {:}".format(redo.sum(), len(redo)))
+    
+    # too many changes, so rebin everything
+    if redo.sum()>maxfrac*len(redo):
+        return voronoi.bin2d(xp, yp, pix_signal, pix_noise, targetSN,
+            graphs=False, quiet=vquiet)
+    
+    # kept bins are renumbered in their previous order
+    kept = np.flatnonzero(~changed & (bin_npix>0))
+    newid = -np.ones(nprev, dtype="int")
+    newid[kept] = np.arange(len(kept))
+    pix_bin = np.where(redo, -1, newid[prev_bin])
+    
+    xbin = prev_gen[0][kept]
+    ybin = prev_gen[1][kept]
+    sn = bin_sn[kept]
+    npix = bin_npix[kept]
+    scale = prev_gen[2][kept]
+    
+    # new bins for the pixels that need rebinning
+    if redo.sum()==1:
+        pix_bin[redo] = len(kept)
+        xbin = np.append(xbin, xp[redo])
+        ybin = np.append(ybin, yp[redo])
+        sn = np.append(sn, signal[redo]/noise[redo])
+        npix = np.append(npix, 1)
+        scale = np.append(scale, 1.)
+    elif redo.any():
+        rbin, rx, ry, rsn, rnpix, rscale = voronoi.bin2d(xp[redo], yp[redo],
+            pix_signal[redo], pix_noise[redo], targetSN, graphs=False,
+            quiet=vquiet)
+        pix_bin[redo] = np.asarray(rbin) + len(kept)
+        xbin = np.append(xbin, rx)
+        ybin = np.append(ybin, ry)
+        sn = np.append(sn, rsn)
+        npix = np.append(npix, rnpix)
+        scale = np.append(scale, rscale)
+    
+    return pix_bin, xbin, ybin, sn, npix, scale
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -----------------------------------------------------------------------------
+# TOOLBOX.MIXTURE_LOGLIKE
+# Laura L Watkins [lauralwatkins@gmail.com]
+# -----------------------------------------------------------------------------
+
+from __future__ import division, print_function
+import numpy as np
+from .multigauss import _factorise, _logpdf_factor
+
+
+def mixture_loglike(x, mu, cov, weights, xcov=None, resp=False):
+    
+    """
+    Log-likelihood of each of P datapoints under a mixture of K multivariate
+    Gaussians of dimension N, with each datapoint convolved with its own
+    error distribution. For each component, the covariance matrix for each
+    datapoint is the sum of the component covariance and the datapoint
+    error covariance, and the densities are combined in log space (with the
+    log-sum-exp), so the result does not underflow far from the components.
+    The components are evaluated one at a time, so the memory needed is the
+    same as for one call to multigauss with P Gaussians.
+    
+    INPUTS
+      x       : datapoints (P x N array)
+      mu      : means of the components (K x N array)
+      cov     : covariance matrices of the components (K x N x N array)
+      weights : fractions of each component, which should sum to 1 (array
+                of length K)
+    
+    OPTIONS
+      xcov : error covariance matrices of the datapoints (P x N x N array)
+             [default None, no errors]
+      resp : also return the responsibilities, the probability that each
+             datapoint belongs to each component (P x K array), for
+             expectation-maximisation [default False]
+    
+    NOTES
+      A ValueError is raised if any of the summed covariance matrices is not
+      positive definite.
+    """
+    
+    x = np.asarray(x, dtype="float")
+    mu = np.asarray(mu, dtype="float")
+    cov = np.asarray(cov, dtype="float")
+    weights = np.asarray(weights, dtype="float")
+    
+    ncomp = mu.shape[0]
+    logp = np.empty((x.shape[0], ncomp))
+    
+    # log of each component at each datapoint, with the component weight
+    for k in range(ncomp):
+        total = cov[k][None] if xcov is None else xcov + cov[k]
+        try:
+            tril, logdet = _factorise(total)
+        except np.linalg.LinAlgError:
+            raise ValueError("Covariance matrices must be positive definite.")
+        with np.errstate(divide="ignore"):
+            logp[:,k] = _logpdf_factor(x, mu[k][None], tril, logdet, True) \
+                + np.log(weights[k])
+    
+    # log-sum-exp over the components
+    top = logp.max(axis=1)
+    top[~np.isfinite(top)] = 0.
+    loglike = top + np.log(np.sum(np.exp(logp-top[:,None]), axis=1))
+    
+    if not resp: return loglike
+    
+    return loglike, np.exp(logp-loglike[:,None])
@@ -8,44 +8,222 @@ from __future__ import division, print_function
 import numpy as np
 
 
-def multigauss(x, mu, cov, norm=True):
+def multigauss(x, mu, cov, norm=True, log=False, chunk_size=None,
+    memory_limit=None, threads=None, out=None):
     
     """
     Evaluates multivariate Gaussian distributions, each at different data
     points. This code is optimised to evaluate M Gaussians of dimension N
-    at M points. The distribution is normalised by default but there is an
-    option to turn off normalisation.
+    at M points, or at K points each. The distribution is normalised by
+    default but there is an option to turn off normalisation.
     
     (By contrast, the scipy.stats.multivariatenormal function can only
     evaluate one Gaussian of dimension N at M points in one call, so (slow)
     for loops are required for >1 Gaussian. This method is much faster for
     large numbers of Gaussians.)
     
+    The covariance matrices are factorised with a Cholesky decomposition,
+    which is faster and more stable than inverting them. If any covariance
+    matrix is not positive definite, the function falls back on inverting
+    the matrices, and points with a negative exponent are given nan.
+    
     INPUTS
-      x    : variable coordinate (M x N array)
-      mu   : mean of distribution (M x N array)
+      x    : variable coordinate (M x N array, or M x K x N array for K
+             points per Gaussian, or 1 x K x N array for K points shared by
+             all of the Gaussians)
+      mu   : mean of distribution (M x N array, or 1 x N array or array of
+             length N for a mean shared by all of the Gaussians)
       cov  : covariance matrix for distribution (M x N x N array)
     
     KEYWORDS
       norm : option to normalise distribution [default: True]
+      log  : option to return the log of the distribution, which does not
+             underflow far from the mean [default: False]
+      chunk_size : number of Gaussians to evaluate at a time [default: None,
+             all at once unless memory_limit is given]
+      memory_limit : approximate limit in bytes on the temporary arrays for
+             each chunk, used to set the chunk size [default: None]
+      threads : number of threads to share the chunks between [default:
+             None, no threads]
+      out  : array for the results, e.g. a memmap [default: None]
+    
+    NOTES
+      Chunks are evaluated into a single output array, so the memory needed
+      beyond the inputs and output is set by the chunk size. The Cholesky
+      factorisation and the array arithmetic release the GIL, so chunks can
+      run in parallel on threads. The speedup is at most the number of
+      physical cores, and is lower for small N, where there is little
+      arithmetic per Gaussian and the run time is set by memory bandwidth.
+      Chunks of ~10^4-10^5 Gaussians keep the overheads per chunk small.
+      Run benchmarks/multigauss_threads.py to measure the scaling on a
+      given machine.
+    """
+    
+    x = np.asarray(x)
+    mu = np.asarray(mu)
+    cov = np.asarray(cov)
+    
+    # output has one row per Gaussian, and a column per point if K points
+    ngauss = cov.shape[0]
+    ndim = cov.shape[-1]
+    npoints = x.shape[1] if x.ndim == 3 else 1
+    shape = (ngauss,) + x.shape[1:-1]
+    if out is None: out = np.empty(shape)
+    
+    # chunk size from the memory for the factors and the temporary arrays
+    # of each Gaussian (8 bytes per element)
+    if memory_limit is not None:
+        nbytes = 8*(2*ndim**2 + 3*npoints*ndim + 2*npoints)
+        limit = max(int(memory_limit//nbytes), 1)
+        chunk_size = limit if chunk_size is None else min(chunk_size, limit)
+    if chunk_size is None: chunk_size = max(ngauss, 1)
+    chunk_size = int(chunk_size)
+    
+    # points and means shared by all Gaussians are not split into chunks
+    xshared = _shared(x, ngauss, "x")
+    mushared = _shared(mu, ngauss, "mu")
+    
+    def run(start):
+        stop = start+chunk_size
+        xc = x if xshared else x[start:stop]
+        muc = mu if mushared else mu[start:stop]
+        out[start:stop] = _evaluate(xc, muc, cov[start:stop], norm, log)
+    
+    starts = range(0, ngauss, chunk_size)
+    if threads and threads>1 and len(starts)>1:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(run, starts))
+    else:
+        for start in starts: run(start)
+    
+    return out
+
+
+def _shared(values, ngauss, name):
+    
+    """
+    Whether points or means are shared by all of the Gaussians (a single
+    row, or no row axis), rather than given for each Gaussian. Raises a
+    ValueError if the number of rows does not match the number of Gaussians.
+    """
+    
+    if values.ndim == 1 or values.shape[0] == 1: return True
+    if values.shape[0] == ngauss: return False
+    
+    raise ValueError("{:} has {:} rows but there are {:} Gaussians.".format(
+        name, values.shape[0], ngauss))
+
+
+def _evaluate(x, mu, cov, norm, log):
+    
+    """
+    Evaluate one chunk of Gaussians.
+    """
+    
+    # K points per Gaussian, broadcast against the means
+    if x.ndim == 3 and mu.ndim == 2: mu = mu[:,None,:]
+    
+    try:
+        result = _logpdf_cholesky(x, mu, cov, norm)
+    except np.linalg.LinAlgError:
+        result = _logpdf_inv(x, mu, cov, norm)
+    
+    if not log: result = np.exp(result)
+    
+    return result
+
+
+def _logpdf_cholesky(x, mu, cov, norm):
+    
+    """
+    Log of the Gaussians, from the Cholesky factors of the covariance
+    matrices. Raises LinAlgError if any matrix is not positive definite.
+    """
+    
+    tril, logdet = _factorise(cov)
+    
+    return _logpdf_factor(x, mu, tril, logdet, norm)
+
+
+def _factorise(cov):
+    
+    """
+    Cholesky factors of the covariance matrices and the logs of their
+    determinants. The lower triangle of each factor is packed by rows, and
+    stored with one row per element (ndim(ndim+1)/2 x M), so that each
+    element is contiguous across the Gaussians.
+    """
+    
+    # number of dimensions
+    ndim = cov.shape[-1]
+    
+    chol = np.linalg.cholesky(cov)
+    rows, cols = np.tril_indices(ndim)
+    tril = np.ascontiguousarray(np.moveaxis(chol[...,rows,cols], -1, 0))
+    
+    # log det(cov) is twice the sum of log diag(L)
+    logdet = 2*np.sum(np.log(np.diagonal(chol, axis1=-2, axis2=-1)),
+        axis=-1)
+    
+    return tril, logdet
+
+
+def _logpdf_factor(x, mu, tril, logdet, norm):
+    
+    """
+    Log of the Gaussians, from packed Cholesky factors (see _factorise).
+    """
+    
+    # number of dimensions
+    ndim = x.shape[-1]
+    
+    # axis for the points if needed
+    if x.ndim == 3:
+        tril = tril[...,None]
+        logdet = logdet[:,None]
+    
+    # solve L z = x-mu by forward substitution, then exponent is |z|^2
+    xmu = x-mu
+    z = np.empty(xmu.shape)
+    k = 0
+    for i in range(ndim):
+        zi = xmu[...,i].copy()
+        for j in range(i):
+            zi -= tril[k]*z[...,j]
+            k += 1
+        z[...,i] = zi/tril[k]
+        k += 1
+    result = -0.5*np.einsum("...i,...i->...", z, z)
+    
+    # normalising factors
+    if norm: result -= 0.5*(ndim*np.log(2*np.pi) + logdet)
+    
+    return result
+
+
+def _logpdf_inv(x, mu, cov, norm):
+    
+    """
+    Log of the Gaussians, from the inverses and determinants of the
+    covariance matrices.
     """
     
     # number of dimensions
     ndim = cov.shape[2]
     
     # normalising factors
-    fac = 1.
-    if norm: fac /= np.sqrt((2*np.pi)**ndim*np.abs(np.linalg.det(cov)))
+    fac = 0.
+    if norm: fac -= 0.5*np.log((2*np.pi)**ndim*np.abs(np.linalg.det(cov)))
+    if np.ndim(fac) and x.ndim == 3: fac = fac[:,None]
     
     # invert covariance matrix
     icov = np.linalg.inv(cov)
     
     # calculate exponent, must be positive definite
     xmu = x-mu
-    expo = np.einsum('ai,aij,aj->a', xmu, icov, xmu)
+    if x.ndim == 3: expo = np.einsum('aki,aij,akj->ak', xmu, icov, xmu)
+    else: expo = np.einsum('ai,aij,aj->a', xmu, icov, xmu)
     expo[expo<0] = np.nan
     
-    # calculate multivariate gaussian
-    result = np.exp(-0.5*expo)*fac
-    
-    return result
+    return -0.5*expo + fac
@@ -0,0 +1,29 @@
+#!/usr/bin/env python
+# -----------------------------------------------------------------------------
+# TOOLBOX.PIXEL_CENTRES
+# Laura L Watkins [lauralwatkins@gmail.com]
+# -----------------------------------------------------------------------------
+
+from __future__ import division, print_function
+from .PixelGrid import PixelGrid
+
+
+def pixel_centres(pix, ids=None, id="id"):
+    
+    """
+    Calculate the x and y centres of pixels from the grid properties in the
+    metadata of a pixel table made by into_pixels. This is most useful for
+    sparse pixel tables, which do not store the centres. The centres are the
+    same as those in the full pixel table.
+    
+    INPUTS
+      pix : pixel table
+    
+    OPTIONS
+      ids : pixel ID numbers [default None, use all pixels in the table]
+      id : name for pixel ID column of input table [default "id"]
+    """
+    
+    if ids is None: ids = pix[id]
+    
+    return PixelGrid.from_meta(pix.meta).centres(ids)
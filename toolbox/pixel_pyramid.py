@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -----------------------------------------------------------------------------
+# TOOLBOX.PIXEL_PYRAMID
+# Laura L Watkins [lauralwatkins@gmail.com]
+# -----------------------------------------------------------------------------
+
+from __future__ import division, print_function
+from .into_pixels import into_pixels
+from .coarsen_pixels import coarsen_pixels, _coarse_ids
+
+
+def pixel_pyramid(xdata, ydata, factors=(2,4,8), x="x", y="y", id="id",
+    n="N", sparse=False, quiet=False, **settings):
+    
+    """
+    Put a 2D dataset into pixels at several resolutions. The data are put
+    into pixels once, at the finest resolution, and each coarser level is
+    made by merging blocks of pixels (see coarsen_pixels), so the data are
+    only read once. The code returns two lists, with one entry per level
+    starting with the finest:
+    1) astropy QTables for the pixels (see into_pixels);
+    2) arrays containing the pixel ID number of each datapoint at that level
+       -- objects outside the limits of the pixel grid are given -1.
+    
+    INPUTS
+      xdata : first coordinate of data (refered to as "x")
+      ydata : second coordinate of data (refered to as "y")
+    
+    OPTIONS
+      factors : how much coarser each level is than the finest, e.g. 2 for
+        pixels twice the size [default (2,4,8)]
+      x : name for x-coordinate column of output tables [default "x"]
+      y : name for y-coordinate column of output tables [default "y"]
+      id : name for pixel ID column of output tables [default "id"]
+      n : name for number of datapoints column of output tables [default "N"]
+      sparse : only keep occupied pixels? [default False]
+      quiet : suppress text outputs? [default False]
+    
+    Other options are passed to into_pixels to set up the finest grid.
+    """
+    
+    result = into_pixels(xdata, ydata, x=x, y=y, id=id, n=n, sparse=sparse,
+        quiet=quiet, **settings)
+    if result is None: return
+    pix, data_pix = result
+    
+    pixs = [pix]
+    data_pixs = [data_pix]
+    for factor in factors:
+        coarse = coarsen_pixels(pix, factor, x=x, y=y, id=id, n=n)[0]
+        pixs.append(coarse)
+        data_pixs.append(_coarse_ids(data_pix, pix.meta["nx"], factor,
+            coarse.meta["nx"]))
+    
+    return pixs, data_pixs
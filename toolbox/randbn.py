@@ -6,10 +6,10 @@
 
 from __future__ import division, print_function
 import numpy as np
-from scipy import integrate, interpolate
+from .CDFSampler import CDFSampler
 
 
-def randbn(fn_name, params=None, num=1, vmin=0., vmax=1., ncdf=20):
+def randbn(fn_name, params=None, num=1, vmin=0., vmax=1., ncdf=20, rng=None):
     
     """
     Draws numbers randomly from an input distribution in a given range.
@@ -23,26 +23,25 @@ def randbn(fn_name, params=None, num=1, vmin=0., vmax=1., ncdf=20):
       vmin    : lower limit of number range [default 0]
       vmax    : upper limit of number range [default 1]
       ncdf    : number of points at which to sample the CDF [**][default 20]
+      rng     : seed or np.random.Generator for the random numbers [default
+                None, use the global numpy random state]
     
     NOTES
       [*] The function 'fn_name' should calculate the values x of the required
       function for a given parameter set p, that is fn_name(x,p).
-      [**] Sampling the CDF at more points will increase the computation time
-      as each point requires an integral, but it may be necessary for complex
-      functions.
+      [**] This is the initial grid for the CDF, which is refined where the
+      function is strongly curved (see CDFSampler).
+      
+      The CDF is built again on every call. To draw from the same
+      distribution many times, create a CDFSampler once and use its sample
+      method instead.
     """
     
-    
-    values = np.linspace(vmin, vmax, ncdf)
-    
-    # normalised cumulative distribution function
-    if params is None: f = lambda x: fn_name(x)
-    else: f = lambda x: fn_name(x, params)
-    cdf = np.cumsum([integrate.quad(f, values[max(0,i-1)], values[i])[0] \
-        for i in range(ncdf)])
-    cdf /= cdf[-1]
+    sampler = CDFSampler(fn_name, params=params, vmin=vmin, vmax=vmax,
+        ncdf=ncdf)
     
     # sample is drawn by calculating the value for randomly-generated CDFs
-    sample = interpolate.interp1d(cdf, values)(np.random.rand(num))
+    if rng is None: sample = sampler.ppf(np.random.rand(num))
+    else: sample = sampler.sample(num, rng=rng)
     
     return sample
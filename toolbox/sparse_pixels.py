@@ -0,0 +1,32 @@
+#!/usr/bin/env python
+# -----------------------------------------------------------------------------
+# TOOLBOX.SPARSE_PIXELS
+# Laura L Watkins [lauralwatkins@gmail.com]
+# -----------------------------------------------------------------------------
+
+from __future__ import division, print_function
+
+
+def sparse_pixels(pix, x="x", y="y", n="N"):
+    
+    """
+    Convert a full pixel table made by into_pixels into the sparse layout,
+    which only keeps the pixels that contain datapoints and does not store
+    the pixel centres (see pixel_centres).
+    
+    INPUTS
+      pix : full pixel table
+    
+    OPTIONS
+      x : name for x-coordinate column of input table [default "x"]
+      y : name for y-coordinate column of input table [default "y"]
+      n : name for number of datapoints column of input table [default "N"]
+    """
+    
+    if pix.meta.get("sparse"): return pix
+    
+    sparse = pix[pix[n]>0]
+    sparse.remove_columns([c for c in (x, y) if c in sparse.colnames])
+    sparse.meta = dict(pix.meta, sparse=True)
+    
+    return sparse